@@ -1,16 +1,22 @@
 import asyncio
 
-import aiohttp
-
 from MSMetaEnhancer.libs.Annotator import Annotator
 from MSMetaEnhancer.libs.Converter import Converter
 from MSMetaEnhancer.libs.Curator import Curator
-from MSMetaEnhancer.libs.data import Spectra, DataFrame
+from MSMetaEnhancer.libs.data import Spectra, DataFrame, IndexedSpectra
 from MSMetaEnhancer.libs.utils import logger
+from MSMetaEnhancer.libs.utils.Cache import PersistentCache
+from MSMetaEnhancer.libs.utils.Checkpoint import Checkpoint
+from MSMetaEnhancer.libs.utils.Connection import ConnectionPool
 from MSMetaEnhancer.libs.utils.ConverterBuilder import ConverterBuilder
+from MSMetaEnhancer.libs.utils.Deduplicator import Deduplicator
+from MSMetaEnhancer.libs.utils.Delta import DeltaWriter, apply_delta
 from MSMetaEnhancer.libs.utils.Errors import UnknownFileFormat
+from MSMetaEnhancer.libs.utils.Incremental import IncrementalState
 from MSMetaEnhancer.libs.utils.Job import convert_to_jobs
 from MSMetaEnhancer.libs.utils.Monitor import Monitor
+from MSMetaEnhancer.libs.utils.Pipeline import annotate_in_order
+from MSMetaEnhancer.libs.utils.Retry import RetryBudget
 
 
 class Application:
@@ -18,14 +24,17 @@ class Application:
         self.data = None
         logger.setup(log_level, log_file)
 
-    def load_data(self, filename, file_format):
+    def load_data(self, filename, file_format, metadata_only: bool = False):
         """
         High level method to load Spectra data from given file.
 
         :param filename: path to source spectra file
         :param file_format: format of spectra
+        :param metadata_only: parse only metadata of msp/mgf spectra, peaks are kept in the file
         """
-        if file_format in ["msp", "mgf", "json"]:
+        if metadata_only and file_format in ["msp", "mgf"]:
+            self.data = IndexedSpectra()
+        elif file_format in ["msp", "mgf", "json"]:
             self.data = Spectra()
         elif file_format in ["csv", "tsv", "tabular", "xlsx"]:
             self.data = DataFrame()
@@ -42,6 +51,16 @@ class Application:
         """
         self.data.save_data(filename, file_format)
 
+    def apply_delta(self, filename, key=None):
+        """
+        Merge metadata delta sidecar (written during annotation) into current data.
+
+        :param filename: path to the sidecar file
+        :param key: attribute identifying records, if not given records are matched by index
+        :return: number of updated records
+        """
+        return apply_delta(self.data, filename, key)
+
     def curate_metadata(self):
         """
         Updates metadata by curation process.
@@ -58,6 +77,16 @@ class Application:
         repeat: bool = False,
         monitor: Monitor = Monitor(),
         annotator: Annotator = Annotator(),
+        cache: PersistentCache = None,
+        window: int = None,
+        sidecar: DeltaWriter = None,
+        checkpoint: Checkpoint = None,
+        resume: bool = False,
+        incremental: IncrementalState = None,
+        deduplicate: bool = False,
+        connections: ConnectionPool = None,
+        retry_budget: RetryBudget = None,
+        batch_sizes: dict = None,
     ):
         """
         Annotates current Spectra data by specified jobs.
@@ -70,22 +99,46 @@ class Application:
         :param repeat: if some metadata was added, all jobs are executed again
         :param monitor: given Monitor object to observe status of services
         :param annotator: given Annotator object to run the actual annotation
+        :param cache: optional persistent cache of web services responses
+        :param window: if given, the metadata are annotated in a streaming fashion
+            with at most `window` spectra in flight and stored back one by one
+        :param sidecar: optional writer of attributes added to individual spectra
+        :param checkpoint: optional checkpoint where results of annotated spectra are stored continuously
+        :param resume: spectra already stored in the checkpoint are not annotated again,
+            otherwise the checkpoint is cleared first (the checkpoint has to match
+            the data, jobs and converters, CheckpointMismatch is raised otherwise)
+        :param incremental: optional state of the last run, spectra unchanged since then
+            are not annotated again and their previous results are used instead
+        :param deduplicate: spectra with identical values of attributes used by the jobs
+            are annotated only once and the results are shared among them
+        :param connections: optional connection pool (connection limits, keep-alive, DNS cache)
+            creating sessions of web converters
+        :param retry_budget: optional budget of retries shared by all web converters,
+            a new one is used for every run if not given
+        :param batch_sizes: optional maximal numbers of identifiers resolved by a single request
+            for web converters supporting batching, e.g. {"PubChem": 50, "IDSM": 10}
         """
-        async with aiohttp.ClientSession() as session:
+        if connections is None:
+            connections = ConnectionPool()
+        if retry_budget is None:
+            retry_budget = RetryBudget()
+        async with connections:
             builder = ConverterBuilder()
             builder.validate_converters(converters)
             compute_converters, web_converters = builder.build_converters(
-                session, converters
+                None, converters, connections, batch_sizes
             )
 
+            for converter in web_converters.values():
+                converter.cache = cache
+                converter.retry_budget = retry_budget
+
             annotator.set_converters(compute_converters | web_converters)
             monitor.set_converters(web_converters)
 
-            # start converters status checker and wait for first status
+            # start converters status checker in the background
             try:
-                if not monitor.is_alive():
-                    monitor.start()
-                monitor.first_check.wait()
+                monitor.start()
 
                 # create all possible jobs if not given
                 if not jobs:
@@ -95,18 +148,107 @@ class Application:
                         jobs += converter.get_conversion_functions()
                 jobs = convert_to_jobs(jobs)
 
-                metadata_list = self.data.get_metadata()
-
-                logger.set_target_attributes(jobs, len(metadata_list))
-
-                results = await asyncio.gather(
-                    *[
-                        annotator.annotate(metadata, jobs, repeat)
-                        for metadata in metadata_list
-                    ]
-                )
+                logger.set_target_attributes(jobs, len(self.data))
+
+                if checkpoint is not None:
+                    checkpoint.start(
+                        jobs, converters, self.data.iter_metadata(), resume
+                    )
+                if incremental is not None:
+                    incremental.set_context(jobs, converters)
+                deduplicator = Deduplicator(jobs) if deduplicate else None
+
+                async def annotate_metadata(metadata):
+                    if deduplicator is not None:
+                        return await deduplicator.annotate(
+                            metadata,
+                            lambda metadata: annotator.annotate(metadata, jobs, repeat),
+                        )
+                    return await annotator.annotate(metadata, jobs, repeat)
+
+                def restored(original, metadata):
+                    logger.add_coverage_before(original.keys())
+                    logger.add_coverage_after(metadata.keys())
+                    return metadata
+
+                async def annotate_record(index, metadata):
+                    original = dict(metadata)
+                    previous = None
+                    if incremental is not None:
+                        fingerprint = incremental.fingerprint(original)
+                        previous = incremental.restore(fingerprint, original)
+
+                    if checkpoint is not None and index in checkpoint:
+                        metadata = restored(
+                            original, checkpoint.restore(index, metadata)
+                        )
+                    elif previous is not None:
+                        metadata = restored(original, previous)
+                    else:
+                        metadata = await annotate_metadata(metadata)
+                        if checkpoint is not None:
+                            checkpoint.write(index, original, metadata)
+
+                    if incremental is not None:
+                        incremental.update(fingerprint, original, metadata)
+                    if sidecar is not None:
+                        sidecar.write(index, original, metadata)
+                    return metadata
+
+                if window:
+                    results = None
+                    async for index, metadata in annotate_in_order(
+                        annotate_record,
+                        self.data.iter_metadata(),
+                        window,
+                    ):
+                        self.data.update_metadata(index, metadata)
+                else:
+                    results = await asyncio.gather(
+                        *[
+                            annotate_record(index, metadata)
+                            for index, metadata in enumerate(self.data.get_metadata())
+                        ]
+                    )
             finally:
-                monitor.join()
-
-        self.data.fuse_metadata(results)
+                await monitor.stop()
+                if cache is not None:
+                    cache.flush()
+                if sidecar is not None:
+                    sidecar.flush()
+                if checkpoint is not None:
+                    checkpoint.flush()
+
+        if results is not None:
+            self.data.fuse_metadata(results)
+        if incremental is not None:
+            incremental.save()
         logger.write_metrics()
+        logger.write_statistics(
+            "Concurrency limits",
+            {
+                name: converter.concurrency.get_statistics()
+                for name, converter in web_converters.items()
+            },
+        )
+        logger.write_statistics("Connections", connections.get_statistics())
+        if web_converters:
+            logger.write_statistics(
+                "Retry budget",
+                {"web converters": retry_budget.get_statistics()},
+                label="Shared by",
+            )
+        if annotator.cost_model is not None:
+            logger.write_statistics(
+                "Job costs", annotator.cost_model.get_statistics(), label="Job"
+            )
+        for converter in compute_converters.values():
+            # caches of converters computing in other processes are not visible here
+            if hasattr(converter, "get_statistics") and not converter.in_process_pool:
+                logger.write_statistics(
+                    f"{converter.converter_name} molecule cache",
+                    converter.get_statistics(),
+                    label="Structure",
+                )
+        if cache is not None:
+            logger.write_statistics("Persistent cache", cache.get_statistics())
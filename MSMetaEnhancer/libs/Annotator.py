@@ -1,4 +1,7 @@
+import asyncio
+import time
 import traceback
+from collections import deque
 
 from MSMetaEnhancer.libs.Curator import Curator
 from MSMetaEnhancer.libs.utils import logger
@@ -10,6 +13,7 @@ from MSMetaEnhancer.libs.utils.Errors import (
     DataAlreadyPresent,
 )
 from MSMetaEnhancer.libs.utils.Logger import LogRecord
+from MSMetaEnhancer.libs.utils.Planner import CostModel, JobPlanner
 
 
 class Annotator:
@@ -17,9 +21,16 @@ class Annotator:
     Annotator is responsible for annotation process of single spectra.
     """
 
-    def __init__(self):
+    def __init__(self, concurrent: bool = False, cost_model: CostModel = None):
+        """
+        :param concurrent: whether to execute all jobs ready for given spectra concurrently
+        :param cost_model: if given, jobs competing for the same target attribute
+            are executed from the cheapest one according to measured costs
+        """
         self.converters = dict()
         self.curator = Curator()
+        self.concurrent = concurrent
+        self.cost_model = cost_model
 
     def set_converters(self, converters):
         self.converters = converters
@@ -32,48 +43,192 @@ class Annotator:
         and tries to obtain 'Target' attribute based on 'Source' attribute using
         'Converter' converter.
 
+        In repeat mode, only jobs which might benefit from newly obtained metadata
+        (their source attribute was just obtained or their target attribute was
+        cached by their converter) are executed again.
+
+        With a cost model, jobs competing for the same target attribute are reordered
+        so the cheapest one (according to measurements so far) is tried first,
+        unless its source attribute can only be obtained by a later job.
+
+        In concurrent mode, all jobs with available source attribute are executed at once
+        and further jobs are started as soon as their source attribute is obtained,
+        so `repeat` has no additional effect.
+
         :param metadata: given metadata
         :param jobs: specified list of jobs to be executed
-        :param repeat: if some metadata was added, all jobs are executed again
+        :param repeat: if some metadata was added, dependent jobs are executed again
         :return: annotated dictionary
         """
         cache = dict()
         log = LogRecord(dict(metadata))
         logger.add_coverage_before(metadata.keys())
 
-        added_metadata = True
-        while added_metadata:
-            added_metadata = False
+        if self.cost_model is not None:
+            jobs = JobPlanner(jobs).order_by_cost(self.job_cost, metadata.keys())
+
+        if self.concurrent:
+            metadata = await self.annotate_concurrently(metadata, jobs, cache, log)
+        elif repeat:
+            metadata = await self.annotate_with_planner(metadata, jobs, cache, log)
+        else:
             for job in jobs:
                 if job.target not in metadata:
-                    try:
-                        metadata, cache = await self.execute_job_with_cache(
-                            job, metadata, cache, log
-                        )
-                        if repeat:
-                            added_metadata = True
-                    except (
-                        SourceAttributeNotAvailable,
-                        TargetAttributeNotRetrieved,
-                    ) as exc:
-                        log.update(exc, job, level=3)
-                    except (ServiceNotAvailable, UnknownResponse) as exc:
-                        log.update(exc, job, level=2)
-                    except Exception:
-                        log.update(Exception(traceback.format_exc()), job, level=1)
+                    metadata, _ = await self.run_job(job, metadata, cache, log)
+                else:
+                    self.log_already_present(job, log)
+
+        logger.add_logs(log)
+        logger.add_coverage_after(metadata.keys())
+
+        return metadata
+
+    async def annotate_with_planner(self, metadata, jobs, cache, log):
+        """
+        Execute jobs using a worklist until no job can obtain new metadata.
+
+        Initially, all jobs are scheduled in the given order. After a job is executed,
+        only jobs depending on the obtained attributes are scheduled again.
+
+        :param metadata: given metadata
+        :param jobs: specified list of jobs to be executed
+        :param cache: given cache for this spectra
+        :param log: object storing logs related to current metadata
+        :return: annotated dictionary
+        """
+        planner = JobPlanner(jobs)
+        worklist = deque(range(len(jobs)))
+        scheduled = set(worklist)
+        reported = set()
+
+        while worklist:
+            index = worklist.popleft()
+            scheduled.discard(index)
+            job = jobs[index]
+
+            if job.target in metadata:
+                if index not in reported:
+                    self.log_already_present(job, log)
+                    reported.add(index)
+                continue
+
+            present = set(metadata)
+            cached = set(cache.get(job.converter, dict()))
+            metadata, executed = await self.run_job(job, metadata, cache, log)
+
+            triggered = planner.triggered_by_cache(
+                job.converter, set(cache.get(job.converter, dict())) - cached
+            )
+            if executed:
+                triggered += planner.triggered_by(set(metadata) - present)
+
+            for dependent in sorted(set(triggered)):
+                if (
+                    dependent not in scheduled
+                    and jobs[dependent].target not in metadata
+                ):
+                    worklist.append(dependent)
+                    scheduled.add(dependent)
+        return metadata
+
+    async def annotate_concurrently(self, metadata, jobs, cache, log):
+        """
+        Execute all ready jobs concurrently.
+
+        A job is ready if its source attribute is available and its target attribute
+        is neither present nor claimed by another running job. Each target attribute
+        is claimed by a single job at a time, competing jobs are started only if the
+        claiming job fails. Every job is executed at most once.
+
+        :param metadata: given metadata
+        :param jobs: specified list of jobs to be executed
+        :param cache: given cache for this spectra
+        :param log: object storing logs related to current metadata
+        :return: annotated dictionary
+        """
+        claimed = set()
+        attempted = set()
+        running = dict()
+
+        for index, job in enumerate(jobs):
+            if job.target in metadata:
+                self.log_already_present(job, log)
+                attempted.add(index)
+
+        def start_ready_jobs():
+            for index, job in enumerate(jobs):
+                if (
+                    index not in attempted
+                    and job.source in metadata
+                    and job.target not in metadata
+                    and job.target not in claimed
+                ):
+                    attempted.add(index)
+                    claimed.add(job.target)
+                    task = asyncio.ensure_future(
+                        self.run_job(job, metadata, cache, log)
+                    )
+                    running[task] = job
+
+        start_ready_jobs()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                job = running.pop(task)
+                claimed.discard(job.target)
+                result, executed = task.result()
+                if executed and result is not metadata:
+                    metadata.update(result)
+            start_ready_jobs()
+
+        for index, job in enumerate(jobs):
+            if index not in attempted:
+                if job.target in metadata:
+                    self.log_already_present(job, log)
                 else:
                     log.update(
-                        DataAlreadyPresent(
-                            f"Requested attribute {job.target} already present."
+                        SourceAttributeNotAvailable(
+                            f"{job}:\n Attribute {job.source} missing in given metadata."
                         ),
                         job,
-                        level=2,
+                        level=3,
                     )
+        return metadata
 
-        logger.add_logs(log)
-        logger.add_coverage_after(metadata.keys())
+    async def run_job(self, job, metadata, cache, log):
+        """
+        Execute given job and log the reason if it fails.
 
-        return metadata
+        :param job: given job to be executed
+        :param metadata: data to be annotated by the job
+        :param cache: given cache for this spectra
+        :param log: object storing logs related to current metadata
+        :return: updated metadata and whether the job was successful
+        """
+        try:
+            metadata, _ = await self.execute_job_with_cache(job, metadata, cache, log)
+            return metadata, True
+        except (
+            SourceAttributeNotAvailable,
+            TargetAttributeNotRetrieved,
+        ) as exc:
+            log.update(exc, job, level=3)
+        except (ServiceNotAvailable, UnknownResponse) as exc:
+            log.update(exc, job, level=2)
+        except Exception:
+            log.update(Exception(traceback.format_exc()), job, level=1)
+        return metadata, False
+
+    def job_cost(self, job):
+        return self.cost_model.cost(job, self.converters.get(job.converter))
+
+    @staticmethod
+    def log_already_present(job, log):
+        log.update(
+            DataAlreadyPresent(f"Requested attribute {job.target} already present."),
+            job,
+            level=2,
+        )
 
     async def execute_job_with_cache(self, job, metadata, cache, warning):
         """
@@ -96,9 +251,18 @@ class Annotator:
             metadata[job.target] = cache[job.converter][job.target]
         else:
             if converter.is_available:
-                result = await converter.convert(job.source, job.target, data)
-                result = self.curator.filter_invalid_metadata(result, warning, job)
-                cache[job.converter].update(result)
+                start = time.monotonic()
+                try:
+                    result = await converter.convert(job.source, job.target, data)
+                    result = self.curator.filter_invalid_metadata(result, warning, job)
+                    cache[job.converter].update(result)
+                finally:
+                    if self.cost_model is not None:
+                        self.cost_model.record(
+                            job,
+                            time.monotonic() - start,
+                            job.target in cache[job.converter],
+                        )
                 if job.target in cache[job.converter]:
                     metadata[job.target] = cache[job.converter][job.target]
                 else:
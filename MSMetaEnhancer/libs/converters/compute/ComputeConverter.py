@@ -1,10 +1,125 @@
+import asyncio
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
 from MSMetaEnhancer.libs.Converter import Converter
+from MSMetaEnhancer.libs.utils.Batcher import Batcher
 
 
 class ComputeConverter(Converter):
     """
     General class for computation conversion.
+
+    By default, conversions are computed directly in the event loop. Once an `EXECUTOR`
+    is set (e.g. `RDKit.EXECUTOR = ProcessPoolExecutor()`), they are computed in it instead,
+    so they do not block web requests and might use multiple cores. With `BATCH_SIZE` > 1,
+    conversions requested by multiple spectra are collected, deduplicated and sent
+    to the executor together (the default thread pool is used if no `EXECUTOR` is set).
+    Conversions computed in threads use this converter (and its caches), those computed
+    in a process pool use a converter instance of the particular process.
     """
 
+    EXECUTOR: Optional[Executor] = None
+    """Executor (thread or process pool) computing the conversions."""
+    BATCH_SIZE: int = 1
+    """Maximal number of conversions computed by a single executor call."""
+    BATCH_WINDOW: float = 0.01
+    """Time (in seconds) to wait for additional conversions before a batch is computed."""
+
+    def __init__(self):
+        super().__init__()
+        self.batcher = Batcher(
+            self.compute_in_batch, self.BATCH_SIZE, self.BATCH_WINDOW
+        )
+
     async def convert(self, source, target, data):
+        if self.BATCH_SIZE > 1:
+            return await self.batcher.submit((source, target, data))
+        if self.EXECUTOR is not None:
+            request = (source, target, data)
+            result = (await self.compute_in_batch([request]))[request]
+            if isinstance(result, Exception):
+                raise result
+            return result
         return getattr(self, f"{source}_to_{target}")(data)
+
+    @property
+    def in_process_pool(self) -> bool:
+        """
+        Whether conversions are computed in other processes, by their own converter instances.
+        """
+        return isinstance(self.EXECUTOR, ProcessPoolExecutor)
+
+    async def compute_in_batch(self, requests: List[Tuple[str, str, str]]) -> Dict:
+        """
+        Compute multiple conversions by a single executor call.
+
+        :param requests: list of (source, target, data) triples
+        :return: dictionary of request -> its result or raised exception
+        """
+        converter = type(self) if self.in_process_pool else self
+        results = await asyncio.get_running_loop().run_in_executor(
+            self.EXECUTOR, compute_batch, converter, requests
+        )
+        return dict(zip(requests, results))
+
+
+_instances: Dict[type, ComputeConverter] = dict()
+
+
+def get_instance(converter_class: type) -> ComputeConverter:
+    """
+    Get converter instance used for computations within the current process.
+
+    :param converter_class: class of the converter
+    :return: shared instance of the converter
+    """
+    if converter_class not in _instances:
+        _instances[converter_class] = converter_class()
+    return _instances[converter_class]
+
+
+def compute(converter: Union[ComputeConverter, type], source: str, target: str, data):
+    """
+    Compute a single conversion, to be executed in an executor.
+
+    :param converter: converter instance, or its class to use the instance of the current process
+    :param source: given attribute name
+    :param target: required attribute name
+    :param data: given attribute value
+    :return: obtained value of target attribute
+    """
+    if isinstance(converter, type):
+        converter = get_instance(converter)
+    return getattr(converter, f"{source}_to_{target}")(data)
+
+
+def compute_batch(
+    converter: Union[ComputeConverter, type], requests: List[Tuple[str, str, str]]
+) -> List:
+    """
+    Compute multiple conversions, to be executed in an executor.
+
+    Exceptions are returned in place of results, so a failure of a single conversion
+    does not affect the others.
+
+    :param converter: converter instance, or its class to use the instance of the current process
+    :param requests: list of (source, target, data) triples
+    :return: list of results or exceptions
+    """
+    results = []
+    for source, target, data in requests:
+        try:
+            results.append(compute(converter, source, target, data))
+        except Exception as exc:
+            results.append(picklable_exception(exc))
+    return results
+
+
+def picklable_exception(exc: Exception) -> Exception:
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
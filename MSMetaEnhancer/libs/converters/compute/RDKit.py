@@ -1,7 +1,9 @@
 import re
+from functools import lru_cache
+
 from rdkit.Chem.Descriptors import ExactMolWt
-from rdkit.Chem import MolFromSmiles, MolToSmiles
-from rdkit.Chem.inchi import MolFromInchi
+from rdkit.Chem import Mol, MolFromSmiles, MolToSmiles
+from rdkit.Chem.inchi import InchiToInchiKey, MolFromInchi, MolToInchi, MolToInchiKey
 from rdkit.Chem.rdMolDescriptors import CalcMolFormula
 from rdkit.Chem import Atom
 
@@ -12,18 +14,53 @@ from MSMetaEnhancer.libs.converters.compute.ComputeConverter import ComputeConve
 class RDKit(ComputeConverter):
     """
     RDKit is a collection of chemo-informatics and machine-learning software.
+
+    Parsed molecules are kept in LRU caches keyed by the structure string,
+    so the same structure is not parsed again by different conversions or spectra.
+    Conversions get copies of the cached molecules, as RDKit stores computed properties
+    on a molecule and the conversions might run in multiple threads.
     """
 
+    MOL_CACHE_SIZE: int = 4096
+    """Maximal number of parsed molecules kept per structure format."""
+
     def __init__(self):
         super().__init__()
+        self.parse_smiles = lru_cache(maxsize=self.MOL_CACHE_SIZE)(MolFromSmiles)
+        self.parse_inchi = lru_cache(maxsize=self.MOL_CACHE_SIZE)(MolFromInchi)
         # generate top level methods defining allowed conversions
         conversions = [
             ("smiles", "mw", "from_smiles"),
             ("canonical_smiles", "mw", "from_smiles"),
             ("isomeric_smiles", "mw", "from_smiles"),
+            ("canonical_smiles", "inchi", "smiles_to_inchi"),
+            ("isomeric_smiles", "inchi", "smiles_to_inchi"),
+            ("canonical_smiles", "inchikey", "smiles_to_inchikey"),
+            ("isomeric_smiles", "inchikey", "smiles_to_inchikey"),
+            ("canonical_smiles", "formula", "smiles_to_formula"),
+            ("isomeric_smiles", "formula", "smiles_to_formula"),
+            ("isomeric_smiles", "canonical_smiles", "smiles_to_canonical_smiles"),
         ]
         self.create_top_level_conversion_methods(conversions, asynch=False)
 
+    def mol_from_smiles(self, smiles):
+        """
+        Parse SMILES using the molecule cache.
+
+        :param smiles: given SMILES
+        :return: private copy of the parsed molecule (None if invalid)
+        """
+        return copy_mol(self.parse_smiles(smiles))
+
+    def mol_from_inchi(self, inchi):
+        """
+        Parse InChI using the molecule cache.
+
+        :param inchi: given InChI
+        :return: private copy of the parsed molecule (None if invalid)
+        """
+        return copy_mol(self.parse_inchi(inchi))
+
     def from_smiles(self, smiles):
         """
         Compute molecular exact weight from SMILES.
@@ -31,7 +68,7 @@ class RDKit(ComputeConverter):
         :param smiles: given SMILES
         :return: computed molecular weight
         """
-        weight = ExactMolWt(MolFromSmiles(smiles))
+        weight = ExactMolWt(self.mol_from_smiles(smiles))
         return {"mw": weight}
 
     def inchi_to_canonical_smiles(self, inchi):
@@ -41,7 +78,7 @@ class RDKit(ComputeConverter):
         :param inchi: given InChI
         :return: computed canonical SMILES
         """
-        smiles = MolToSmiles(MolFromInchi(inchi), isomericSmiles=False)
+        smiles = MolToSmiles(self.mol_from_inchi(inchi), isomericSmiles=False)
         return {"canonical_smiles": smiles}
 
     def inchi_to_isomeric_smiles(self, inchi):
@@ -51,9 +88,95 @@ class RDKit(ComputeConverter):
         :param inchi: given InChI
         :return: computed isomeric SMILES
         """
-        smiles = MolToSmiles(MolFromInchi(inchi))
+        smiles = MolToSmiles(self.mol_from_inchi(inchi))
         return {"isomeric_smiles": smiles}
 
+    def inchi_to_smiles(self, inchi):
+        """
+        Compute (isomeric) SMILES from InChI.
+
+        :param inchi: given InChI
+        :return: computed SMILES
+        """
+        mol = self.mol_from_inchi(inchi)
+        if mol is None:
+            return {}
+        return {"smiles": MolToSmiles(mol)}
+
+    def inchi_to_inchikey(self, inchi):
+        """
+        Compute InChIKey from InChI.
+
+        :param inchi: given InChI
+        :return: computed InChIKey
+        """
+        inchikey = InchiToInchiKey(inchi)
+        if not inchikey:
+            return {}
+        return {"inchikey": inchikey}
+
+    def inchi_to_mw(self, inchi):
+        """
+        Compute molecular exact weight from InChI.
+
+        :param inchi: given InChI
+        :return: computed molecular weight
+        """
+        mol = self.mol_from_inchi(inchi)
+        if mol is None:
+            return {}
+        return {"mw": ExactMolWt(mol)}
+
+    def smiles_to_inchi(self, smiles):
+        """
+        Compute InChI from SMILES.
+
+        :param smiles: given SMILES
+        :return: computed InChI
+        """
+        mol = self.mol_from_smiles(smiles)
+        inchi = MolToInchi(mol) if mol is not None else None
+        if not inchi:
+            return {}
+        return {"inchi": inchi}
+
+    def smiles_to_inchikey(self, smiles):
+        """
+        Compute InChIKey from SMILES.
+
+        :param smiles: given SMILES
+        :return: computed InChIKey
+        """
+        mol = self.mol_from_smiles(smiles)
+        inchikey = MolToInchiKey(mol) if mol is not None else None
+        if not inchikey:
+            return {}
+        return {"inchikey": inchikey}
+
+    def smiles_to_canonical_smiles(self, smiles):
+        """
+        Canonicalise SMILES, dropping stereochemistry.
+
+        :param smiles: given SMILES
+        :return: computed canonical SMILES
+        """
+        mol = self.mol_from_smiles(smiles)
+        if mol is None:
+            return {}
+        return {"canonical_smiles": MolToSmiles(mol, isomericSmiles=False)}
+
+    def smiles_to_isomeric_smiles(self, smiles):
+        """
+        Canonicalise SMILES, keeping stereochemistry.
+
+        :param smiles: given SMILES
+        :return: computed isomeric SMILES
+        """
+        mol = self.mol_from_smiles(smiles)
+        if mol is None:
+            return {}
+        return {"isomeric_smiles": MolToSmiles(mol)}
+
     def formula_to_mw(self, formula):
         """
         Compute molecular exact weight from molecular formula.
@@ -84,7 +207,7 @@ class RDKit(ComputeConverter):
         :param smiles: given SMILES
         :return: computed molecular formula
         """
-        mol = MolFromSmiles(smiles)
+        mol = self.mol_from_smiles(smiles)
         if mol is None:
             return {"formula": ""}
 
@@ -99,8 +222,26 @@ class RDKit(ComputeConverter):
         :param inchi: given InChI
         :return: computed molecular formula
         """
-        mol = MolFromInchi(inchi)
+        mol = self.mol_from_inchi(inchi)
         if mol is None:
             return {"formula": ""}
         formula = CalcMolFormula(mol)
         return {"formula": formula}
+
+    def get_statistics(self) -> dict:
+        """
+        Compute hit and miss counts of the parsed molecule caches.
+
+        :return: dictionary of structure format to its counts
+        """
+        return {
+            name: {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+            for name, info in [
+                ("smiles", self.parse_smiles.cache_info()),
+                ("inchi", self.parse_inchi.cache_info()),
+            ]
+        }
+
+
+def copy_mol(mol):
+    return Mol(mol) if mol is not None else None
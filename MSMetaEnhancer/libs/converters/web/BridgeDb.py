@@ -1,4 +1,7 @@
+from frozendict import frozendict
+
 from MSMetaEnhancer.libs.converters.web.WebConverter import WebConverter
+from MSMetaEnhancer.libs.utils.Batcher import Batcher
 
 
 class BridgeDb(WebConverter):
@@ -9,10 +12,20 @@ class BridgeDb(WebConverter):
     More info about the available conversions: https://bridgedb.github.io/
     """
 
-    def __init__(self, session):
-        super().__init__(session)
+    BATCH_SIZE: int = 1
+    """Default maximal number of identifiers resolved by a single batch request, 1 disables batching."""
+
+    BATCH_WINDOW: float = 0.05
+    """Time (in seconds) to collect pending lookups before a batch request is sent."""
+
+    def __init__(self, session, batch_size=None):
+        super().__init__(session, batch_size)
         # service URLs
-        self.endpoints = {"BridgeDb": "https://webservice.bridgedb.org/Human/xrefs/"}
+        self.endpoints = {
+            "BridgeDb": "https://webservice.bridgedb.org/Human/xrefs/",
+            "BridgeDb_batch": "https://webservice.bridgedb.org/Human/xrefsBatch/",
+        }
+        self.header = frozendict({"Content-Type": "text/plain"})
 
         self.codes = {
             "hmdbid": "Ch",
@@ -30,6 +43,17 @@ class BridgeDb(WebConverter):
             "Wikidata": "wikidataid",
             "KEGG Compound": "keggid",
         }
+        self.attributes = {code: attribute for attribute, code in self.codes.items()}
+
+        # collect lookups of multiple identifiers (per source system) to be resolved together
+        self.batchers = {
+            code: Batcher(
+                lambda ids, code=code: self.resolve_batch(code, ids),
+                self.batch_size,
+                self.BATCH_WINDOW,
+            )
+            for code in self.codes.values()
+        }
 
         # generate top level methods defining allowed conversions
         conversions = [
@@ -73,8 +97,7 @@ class BridgeDb(WebConverter):
         :param hmdbid: given HMDB ID number
         :return: obtained IDs
         """
-        args = f"{self.codes['hmdbid']}/{hmdbid}"
-        return await self.call_service(args)
+        return await self.call_service(self.codes["hmdbid"], hmdbid)
 
     async def from_pubchemid(self, pubchemid):
         """
@@ -83,8 +106,7 @@ class BridgeDb(WebConverter):
         :param pubchemid: given PubChem ID number
         :return: obtained IDs
         """
-        args = f"{self.codes['pubchemid']}/{pubchemid}"
-        return await self.call_service(args)
+        return await self.call_service(self.codes["pubchemid"], pubchemid)
 
     async def from_chemspiderid(self, chemspiderid):
         """
@@ -93,8 +115,7 @@ class BridgeDb(WebConverter):
         :param chemspiderid: given ChemSpider ID number
         :return: obtained IDs
         """
-        args = f"{self.codes['chemspiderid']}/{chemspiderid}"
-        return await self.call_service(args)
+        return await self.call_service(self.codes["chemspiderid"], chemspiderid)
 
     async def from_wikidataid(self, wikidataid):
         """
@@ -103,8 +124,7 @@ class BridgeDb(WebConverter):
         :param wikidataid: given WikiData ID number
         :return: obtained IDs
         """
-        args = f"{self.codes['wikidataid']}/{wikidataid}"
-        return await self.call_service(args)
+        return await self.call_service(self.codes["wikidataid"], wikidataid)
 
     async def from_chebiid(self, chebiid):
         """
@@ -113,8 +133,7 @@ class BridgeDb(WebConverter):
         :param chebiid: given ChEBI ID number
         :return: obtained IDs
         """
-        args = f"{self.codes['chebiid']}/{chebiid}"
-        return await self.call_service(args)
+        return await self.call_service(self.codes["chebiid"], chebiid)
 
     async def from_keggid(self, keggid):
         """
@@ -123,14 +142,47 @@ class BridgeDb(WebConverter):
         :param keggid: given KEGG ID number
         :return: obtained IDs
         """
-        args = f"{self.codes['keggid']}/{keggid}"
-        return await self.call_service(args)
+        return await self.call_service(self.codes["keggid"], keggid)
+
+    async def call_service(self, code, identifier):
+        """
+        General method to call BridgeDb service.
+
+        If batching is enabled, the identifier is resolved together with other
+        pending identifiers of the same system.
+
+        :param code: BridgeDb system code of the identifier
+        :param identifier: given identifier
+        :return: obtained IDs
+        """
+        if self.batch_size > 1:
+            return await self.batchers[code].submit(str(identifier))
 
-    async def call_service(self, args):
-        response = await self.query_the_service("BridgeDb", args)
+        response = await self.query_the_service("BridgeDb", f"{code}/{identifier}")
         if response:
             return self.parse_attributes(response)
 
+    async def resolve_batch(self, code, identifiers):
+        """
+        Convert multiple IDs of the same system to all possible IDs using single request.
+
+        :param code: BridgeDb system code of the identifiers
+        :param identifiers: given list of identifiers
+        :return: dictionary of identifier -> obtained IDs
+        """
+
+        async def query(keys):
+            response = await self.query_batch(
+                "BridgeDb_batch",
+                code,
+                method="POST",
+                data="\n".join(keys),
+                headers=self.header,
+            )
+            return self.parse_batch(response)
+
+        return await self.resolve_with_cache(f"batch/{code}", identifiers, query)
+
     def parse_attributes(self, response):
         """
         Parse all available attributes obtained using BridgeDb.
@@ -147,3 +199,25 @@ class BridgeDb(WebConverter):
                 if identifier in self.identifiers.keys():
                     result[self.identifiers[identifier]] = value
         return result
+
+    def parse_batch(self, response):
+        """
+        Parse all available attributes of multiple identifiers obtained using BridgeDb batch request.
+
+        Every line of the response consists of the source identifier, its system name
+        and a comma-separated list of cross-references of form `code:identifier`.
+
+        :param response: BridgeDb batch response
+        :return: dictionary of identifier -> all parsed data
+        """
+        results = dict()
+
+        for line in response.split("\n"):
+            if line:
+                source, _, xrefs = (line.split("\t") + ["", ""])[:3]
+                result = results.setdefault(source, dict())
+                for xref in xrefs.split(","):
+                    code, _, value = xref.partition(":")
+                    if value and code in self.attributes:
+                        result[self.attributes[code]] = value
+        return results
@@ -1,6 +1,5 @@
-import json
-
 from MSMetaEnhancer.libs.converters.web.WebConverter import WebConverter
+from MSMetaEnhancer.libs.utils.Json import json_loads
 
 
 class CTS(WebConverter):
@@ -100,7 +99,7 @@ class CTS(WebConverter):
         :param attribute: expected attribute name in the response
         :return: parsed InChiKey
         """
-        response_json = json.loads(response)
+        response_json = json_loads(response)
         if len(response_json[0]["results"]) != 0:
             return {attribute: response_json[0]["results"][0]}
 
@@ -111,7 +110,7 @@ class CTS(WebConverter):
         :param response: CTS compound response to given InChiKey
         :return: all parsed data
         """
-        response_json = json.loads(response)
+        response_json = json_loads(response)
         result = dict()
 
         if "inchicode" in response_json:
@@ -1,9 +1,11 @@
-import asyncio
+import aiohttp
 
 from MSMetaEnhancer.libs.converters.web.WebConverter import WebConverter
 from frozendict import frozendict
 
+from MSMetaEnhancer.libs.utils.Batcher import Batcher
 from MSMetaEnhancer.libs.utils.Generic import escape_single_quotes
+from MSMetaEnhancer.libs.utils.Json import iter_json_array, load_json_array
 
 
 class IDSM(WebConverter):
@@ -15,8 +17,20 @@ class IDSM(WebConverter):
     IDSM service: https://idsm.elixir-czech.cz/
     """
 
-    def __init__(self, session):
-        super().__init__(session)
+    MAX_CONCURRENCY: int = 10
+    """Maximal number of requests in flight allowed by the adaptive limiter."""
+
+    TIMEOUT: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=120, sock_connect=10)
+    """Timeouts of a single request attempt, SPARQL queries (especially batched ones) take longer."""
+
+    BATCH_SIZE: int = 1
+    """Default maximal number of InChIs/names resolved by a single SPARQL query, 1 disables batching."""
+
+    BATCH_WINDOW: float = 0.05
+    """Time (in seconds) to collect pending lookups before a batch query is sent."""
+
+    def __init__(self, session, batch_size=None):
+        super().__init__(session, batch_size)
         # service URLs
         self.endpoints = {"IDSM": "https://idsm.elixir-czech.cz/sparql/endpoint/idsm"}
         self.header = frozendict({"Accept": "application/sparql-results+json"})
@@ -46,8 +60,11 @@ class IDSM(WebConverter):
         ]
         self.create_top_level_conversion_methods(conversions)
 
-        # used to limit the maximal number of simultaneous requests being processed
-        self.semaphore = asyncio.Semaphore(10)
+        # collect lookups of multiple compounds to be resolved by a single query
+        self.batchers = {
+            "inchi": Batcher(self.resolve_inchis, self.batch_size, self.BATCH_WINDOW),
+            "name": Batcher(self.resolve_names, self.batch_size, self.BATCH_WINDOW),
+        }
 
     @escape_single_quotes
     async def iupac_name_to_inchi(self, iupac_name):
@@ -81,6 +98,9 @@ class IDSM(WebConverter):
         :param name: given Chemical name
         :return: all found data
         """
+        if self.batch_size > 1:
+            return await self.batchers["name"].submit(name.lower())
+
         query = f"""
         SELECT DISTINCT ?value ?type
         FROM pubchem:compound FROM pubchem:inchikey FROM descriptor:compound
@@ -111,6 +131,9 @@ class IDSM(WebConverter):
         :param inchi: given InChi
         :return: all found data
         """
+        if self.batch_size > 1:
+            return await self.batchers["inchi"].submit(inchi)
+
         query = f"""
         SELECT DISTINCT ?value ?type
         FROM pubchem:compound FROM pubchem:inchikey FROM descriptor:compound
@@ -130,23 +153,140 @@ class IDSM(WebConverter):
         """
         return await self.call_service(query)
 
+    async def resolve_inchis(self, inchis):
+        """
+        Convert multiple InChis to all possible attributes.
+        InChis without a cached result are resolved by a single SPARQL query.
+
+        :param inchis: given list of (escaped) InChis
+        :return: dictionary of InChi -> all found data
+        """
+        return await self.resolve_with_cache("inchi", inchis, self.query_inchis)
+
+    async def query_inchis(self, inchis):
+        """
+        Resolve multiple InChis by a single SPARQL query.
+
+        :param inchis: given list of (escaped) InChis
+        :return: dictionary of InChi -> all found data
+        """
+        query = f"""
+        SELECT DISTINCT ?key ?value ?type
+        FROM pubchem:compound FROM pubchem:inchikey FROM descriptor:compound
+        WHERE
+        {{
+          VALUES ?key {{ {self.format_values(inchis)} }}
+          VALUES ?type {{
+            sio:CHEMINF_000396 sio:CHEMINF_000382
+            sio:CHEMINF_000399 sio:CHEMINF_000335
+            sio:CHEMINF_000376 sio:CHEMINF_000379 }}
+          ?compound sio:SIO_000008 [
+            rdf:type ?type;
+            sio:SIO_000300 ?value ].
+          ?compound sio:SIO_000008 [
+            rdf:type sio:CHEMINF_000396;
+            sio:SIO_000300 ?key ].
+        }}
+        """
+        return await self.call_batch_service(query, inchis)
+
+    async def resolve_names(self, names):
+        """
+        Convert multiple Chemical names to all possible attributes.
+        Names without a cached result are resolved by a single SPARQL query.
+
+        :param names: given list of (escaped) lowercase Chemical names
+        :return: dictionary of name -> all found data
+        """
+        return await self.resolve_with_cache("name", names, self.query_names)
+
+    async def query_names(self, names):
+        """
+        Resolve multiple Chemical names by a single SPARQL query.
+
+        :param names: given list of (escaped) lowercase Chemical names
+        :return: dictionary of name -> all found data
+        """
+        # names are compared with constants within the synonym graph (as for a single name),
+        # a filter comparing synonyms with a variable would be evaluated as a join
+        query = f"""
+        SELECT DISTINCT ?key ?value ?type
+        FROM pubchem:compound FROM pubchem:inchikey FROM descriptor:compound
+        FROM NAMED pubchem:synonym
+        WHERE
+        {{
+          VALUES ?type {{
+            sio:CHEMINF_000396 sio:CHEMINF_000382
+            sio:CHEMINF_000399 sio:CHEMINF_000335
+            sio:CHEMINF_000376 sio:CHEMINF_000379 }}
+          ?compound sio:SIO_000008 [
+            rdf:type ?type;
+            sio:SIO_000300 ?value ].
+          GRAPH pubchem:synonym {{
+            ?compound sio:SIO_000008 [
+              sio:SIO_000300 ?synonym ]
+            FILTER(lcase(str(?synonym)) IN ({self.format_values(names, ", ")}))
+          }}
+          BIND(lcase(str(?synonym)) AS ?key)
+        }}
+        """
+        return await self.call_batch_service(query, names)
+
+    @staticmethod
+    def format_values(keys, separator=" "):
+        """
+        Format given (escaped) strings as content of SPARQL VALUES block (or IN list).
+
+        :param keys: given list of strings
+        :param separator: separator of the literals (", " for IN list)
+        :return: separated string literals
+        """
+        return separator.join(f"'{key}'" for key in keys)
+
     async def call_service(self, query):
         """
         General method to call IDSM service.
 
-        Uses semaphore to control maximal number of simultaneous requests being processed.
-        Limited to 10 as required by IDSM service.
+        Number of simultaneous requests being processed is limited
+        to 10 (`MAX_CONCURRENCY`) as required by IDSM service.
 
         :param query: given SPARQL query
         :return: obtained attributes
         """
         data = frozendict({"query": query})
-        async with self.semaphore:
-            response = await self.query_the_service(
-                "IDSM", "", method="POST", data=data, headers=self.header
-            )
+        response = await self.query_the_service(
+            "IDSM", "", method="POST", data=data, headers=self.header
+        )
+        if response:
+            bindings = await load_json_array(response, ("results", "bindings"))
+            return self.parse_bindings(bindings)
+
+    async def call_batch_service(self, query, keys):
+        """
+        Call IDSM service with a query binding multiple compounds to ?key variable.
+
+        :param query: given SPARQL query
+        :param keys: (escaped) values of ?key used in the query
+        :return: dictionary of key -> obtained attributes
+        """
+        data = frozendict({"query": query})
+        response = await self.query_batch(
+            "IDSM", "", method="POST", data=data, headers=self.header
+        )
+        # the service returns unescaped literals
+        keys = {key.replace("\\'", "'"): key for key in keys}
+        results = dict()
+
         if response:
-            return self.parse_attributes(response)
+            groups = dict()
+            bindings = await load_json_array(response, ("results", "bindings"))
+            for prop in bindings:
+                key = keys.get(prop["key"]["value"])
+                if key is not None:
+                    groups.setdefault(key, []).append(prop)
+            for key, bindings in groups.items():
+                results[key] = self.parse_bindings(bindings)
+        return results
 
     def parse_attributes(self, response):
         """
@@ -157,10 +297,18 @@ class IDSM(WebConverter):
         :param response: given JSON
         :return: all parsed data
         """
-        response_json = eval(response)
+        return self.parse_bindings(iter_json_array(response, ("results", "bindings")))
+
+    def parse_bindings(self, bindings):
+        """
+        Parse all available attributes (specified in self.attributes) from given SPARQL bindings.
+
+        :param bindings: bindings of ?value and ?type variables
+        :return: all parsed data
+        """
         result = dict()
 
-        for prop in response_json["results"]["bindings"]:
+        for prop in bindings:
             identifier = prop["type"]["value"].rsplit("/", 1)[-1]
             value = prop["value"]["value"]
             for att in self.attributes:
@@ -1,11 +1,12 @@
 import asyncio
-import json
 from frozendict import frozendict
 
 from MSMetaEnhancer.libs.converters.web.WebConverter import WebConverter
+from MSMetaEnhancer.libs.utils.Json import json_loads
 from MSMetaEnhancer.libs.utils.Generic import string_to_seconds
 from MSMetaEnhancer.libs.utils.Errors import UnknownResponse
 from MSMetaEnhancer.libs.utils.Throttler import Throttler
+from MSMetaEnhancer.libs.utils.Batcher import Batcher
 
 
 class PubChem(WebConverter):
@@ -15,8 +16,17 @@ class PubChem(WebConverter):
     PubChem service: https://pubchem.ncbi.nlm.nih.gov/
     """
 
-    def __init__(self, session):
-        super().__init__(session)
+    BATCH_SIZE: int = 1
+    """Default maximal number of CIDs/InChIKeys resolved by a single request, 1 disables batching."""
+
+    BATCH_WINDOW: float = 0.05
+    """Time (in seconds) to collect pending lookups before a batch request is sent."""
+
+    PROPERTY_TABLE: bool = False
+    """Whether to request only the needed properties instead of full compound records."""
+
+    def __init__(self, session, batch_size=None):
+        super().__init__(session, batch_size)
         # service URLs
         self.endpoints = {
             "PubChem": "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/"
@@ -30,6 +40,28 @@ class PubChem(WebConverter):
             {"code": "canonical_smiles", "label": "SMILES", "extra": "Canonical"},
             {"code": "isomeric_smiles", "label": "SMILES", "extra": "Isomeric"},
         ]
+        self.labels = dict()
+        for att in self.attributes:
+            self.labels.setdefault(att["label"], []).append(att)
+
+        # properties requested from the property table and their codes,
+        # PubChem reports (legacy) Canonical/Isomeric SMILES as ConnectivitySMILES/SMILES
+        self.properties = {
+            "InChI": "inchi",
+            "InChIKey": "inchikey",
+            "IUPACName": "iupac_name",
+            "MolecularFormula": "formula",
+            "ConnectivitySMILES": "canonical_smiles",
+            "SMILES": "isomeric_smiles",
+        }
+        self.property_aliases = {
+            "CanonicalSMILES": "canonical_smiles",
+            "IsomericSMILES": "isomeric_smiles",
+        }
+        if self.PROPERTY_TABLE:
+            self.output = f"property/{','.join(self.properties)}/JSON"
+        else:
+            self.output = "JSON"
 
         # generate top level methods defining allowed conversions
         conversions = [
@@ -61,6 +93,16 @@ class PubChem(WebConverter):
         self.create_top_level_conversion_methods(conversions)
 
         self.throttler = Throttler(rate_limit=4)
+        self.limits = [self.throttler]
+
+        # collect lookups of multiple identifiers to be resolved by a single request
+        self.batchers = {
+            "cid": Batcher(self.resolve_pubchemids, self.batch_size, self.BATCH_WINDOW),
+            "inchikey": Batcher(
+                self.resolve_inchikeys, self.batch_size, self.BATCH_WINDOW
+            ),
+            "hmdbid": Batcher(self.resolve_hmdbids, self.batch_size, self.BATCH_WINDOW),
+        }
 
     async def pubchemid_to_hmdbid(self, pubchemid):
         """
@@ -70,17 +112,13 @@ class PubChem(WebConverter):
         :param pubchemid: given Chemical name
         :return: all found data
         """
-        args = f"cid/{pubchemid}/xrefs/RegistryID/JSON"
-        async with self.throttler:
-            response = await self.query_the_service("PubChem", args)
-        response_json = json.loads(response)
+        if self.batch_size > 1:
+            return await self.batchers["hmdbid"].submit(str(pubchemid))
 
-        registry_ids = response_json["InformationList"]["Information"][0]["RegistryID"]
-        hmdbids = [item for item in registry_ids if item.startswith("HMDB")]
-
-        if len(hmdbids) != 0:
-            return {"hmdbid": hmdbids[0]}
-        return dict()
+        args = f"cid/{pubchemid}/xrefs/RegistryID/JSON"
+        response = await self.query_the_service("PubChem", args)
+        response_json = json_loads(response)
+        return self.parse_hmdbid(response_json["InformationList"]["Information"][0])
 
     async def from_pubchemid(self, pubchemid):
         """
@@ -90,7 +128,10 @@ class PubChem(WebConverter):
         :param pubchemid: given Chemical name
         :return: all found data
         """
-        args = f"cid/{pubchemid}/JSON"
+        if self.batch_size > 1:
+            return await self.batchers["cid"].submit(str(pubchemid))
+
+        args = f"cid/{pubchemid}/{self.output}"
         return await self.call_service(args, "GET", None)
 
     async def from_name(self, name):
@@ -101,7 +142,7 @@ class PubChem(WebConverter):
         :param name: given Chemical name
         :return: all found data
         """
-        args = f"name/{name}/JSON"
+        args = f"name/{name}/{self.output}"
         return await self.call_service(args, "GET", None)
 
     async def from_inchi(self, inchi):
@@ -112,7 +153,7 @@ class PubChem(WebConverter):
         :param inchi: given InChi
         :return: all found data
         """
-        args = "inchi/JSON"
+        args = f"inchi/{self.output}"
         return await self.call_service(args, "POST", frozendict({"inchi": inchi}))
 
     async def from_inchikey(self, inchikey):
@@ -123,7 +164,10 @@ class PubChem(WebConverter):
         :param inchikey: given InChiKey
         :return: all found data
         """
-        args = "inchikey/JSON"
+        if self.batch_size > 1:
+            return await self.batchers["inchikey"].submit(inchikey)
+
+        args = f"inchikey/{self.output}"
         return await self.call_service(args, "POST", frozendict({"inchikey": inchikey}))
 
     async def call_service(self, args, method, data):
@@ -140,13 +184,105 @@ class PubChem(WebConverter):
         :param data: source data for POST request
         :return: obtained attributes
         """
-        async with self.throttler:
-            response = await self.query_the_service(
-                "PubChem", args, method=method, data=data
-            )
+        response = await self.query_the_service(
+            "PubChem", args, method=method, data=data
+        )
         if response:
+            if self.PROPERTY_TABLE:
+                return self.parse_properties(response)
             return self.parse_attributes(response)
 
+    async def resolve_pubchemids(self, pubchemids):
+        """
+        Obtain chemical identifiers for multiple PubChem IDs using single request.
+
+        :param pubchemids: given list of PubChem IDs
+        :return: dictionary of PubChem ID -> all found data
+        """
+
+        async def query(keys):
+            args = f"cid/{','.join(keys)}/{self.output}"
+            response = await self.query_batch("PubChem", args)
+            return self.parse_compounds(response, "pubchemid")
+
+        return await self.resolve_with_cache(
+            f"cid/{self.output}",
+            pubchemids,
+            lambda keys: self.resolve_in_batch(keys, query),
+        )
+
+    async def resolve_inchikeys(self, inchikeys):
+        """
+        Convert multiple InChiKeys to all possible attributes using single request.
+
+        :param inchikeys: given list of InChiKeys
+        :return: dictionary of InChiKey -> all found data
+        """
+
+        async def query(keys):
+            data = frozendict({"inchikey": ",".join(keys)})
+            response = await self.query_batch(
+                "PubChem", f"inchikey/{self.output}", method="POST", data=data
+            )
+            return self.parse_compounds(response, "inchikey")
+
+        return await self.resolve_with_cache(
+            f"inchikey/{self.output}",
+            inchikeys,
+            lambda keys: self.resolve_in_batch(keys, query),
+        )
+
+    async def resolve_hmdbids(self, pubchemids):
+        """
+        Obtain HMDB IDs for multiple PubChem IDs using single request.
+
+        :param pubchemids: given list of PubChem IDs
+        :return: dictionary of PubChem ID -> found HMDB ID
+        """
+
+        async def query(keys):
+            args = f"cid/{','.join(keys)}/xrefs/RegistryID/JSON"
+            response = await self.query_batch("PubChem", args)
+            response_json = json_loads(response)
+            return {
+                str(information.get("CID")): self.parse_hmdbid(information)
+                for information in response_json["InformationList"]["Information"]
+            }
+
+        return await self.resolve_with_cache(
+            "cid/xrefs/RegistryID",
+            pubchemids,
+            lambda keys: self.resolve_in_batch(keys, query),
+        )
+
+    @staticmethod
+    async def resolve_in_batch(keys, query):
+        """
+        Resolve all keys using single batch query.
+
+        PubChem rejects the whole batch if any of the identifiers is invalid,
+        in such case the keys are resolved individually.
+
+        :param keys: given list of identifiers
+        :param query: coroutine function resolving list of keys to dictionary of results
+        :return: dictionary of key -> result (or exception raised for the key)
+        """
+        try:
+            return await query(keys)
+        except UnknownResponse:
+            if len(keys) == 1:
+                raise
+        results = dict()
+        responses = await asyncio.gather(
+            *[query([key]) for key in keys], return_exceptions=True
+        )
+        for key, response in zip(keys, responses):
+            if isinstance(response, Exception):
+                results[key] = response
+            else:
+                results.update(response)
+        return results
+
     async def process_request(self, response, url, method):
         """
         Redefined parent method with additional adjustment of throttling.
@@ -163,12 +299,8 @@ class PubChem(WebConverter):
             )
             if sleep_time:
                 await asyncio.sleep(sleep_time)
-        if response.ok:
-            return result
-        else:
-            raise UnknownResponse(
-                f"Unknown response {response.status}:{result} for {method} request on {url}."
-            )
+        self.check_response(response, result, url, method)
+        return result
 
     def adjust_throttling(self, throttling_header):
         """
@@ -223,24 +355,105 @@ class PubChem(WebConverter):
         :param response: given JSON
         :return: all parsed data
         """
-        response_json = json.loads(response)
+        response_json = json_loads(response)
         result = dict()
 
         if "PC_Compounds" in response_json:
             if len(response_json["PC_Compounds"]) > 0:
-                first_hit = response_json["PC_Compounds"][0]
-
-                pubchemid = first_hit.get("id", {}).get("id", {}).get("cid", None)
-                if pubchemid:
-                    result["pubchemid"] = pubchemid
-
-                for prop in first_hit.get("props", {}):
-                    label = prop["urn"]["label"]
-                    for att in self.attributes:
-                        if label == att["label"]:
-                            if att["extra"]:
-                                if prop["urn"]["name"] == att["extra"]:
-                                    result[att["code"]] = prop["value"]["sval"]
-                            else:
-                                result[att["code"]] = prop["value"]["sval"]
+                result = self.parse_compound(response_json["PC_Compounds"][0])
+        return result
+
+    def parse_properties(self, response):
+        """
+        Parse all available attributes (specified in self.properties) from given property table.
+
+        :param response: given JSON
+        :return: all parsed data
+        """
+        response_json = json_loads(response)
+        records = response_json.get("PropertyTable", {}).get("Properties", [])
+        if len(records) > 0:
+            return self.parse_property_record(records[0])
+        return dict()
+
+    def parse_compounds(self, response, key):
+        """
+        Parse all compounds from given response and index them by given attribute.
+
+        Both full compound records and property tables are supported.
+        Only the first compound is kept for each value of the attribute.
+
+        :param response: given JSON
+        :param key: attribute used to identify the compounds
+        :return: dictionary of attribute value -> all parsed data
+        """
+        response_json = json_loads(response)
+        if "PropertyTable" in response_json:
+            records = map(
+                self.parse_property_record,
+                response_json["PropertyTable"].get("Properties", []),
+            )
+        else:
+            records = map(self.parse_compound, response_json.get("PC_Compounds", []))
+
+        results = dict()
+        for result in records:
+            if key in result:
+                results.setdefault(str(result[key]), result)
+        return results
+
+    def parse_compound(self, compound):
+        """
+        Parse all available attributes (specified in self.attributes) of a single compound record.
+
+        :param compound: given PC_Compounds record
+        :return: all parsed data
+        """
+        result = dict()
+
+        pubchemid = compound.get("id", {}).get("id", {}).get("cid", None)
+        if pubchemid:
+            result["pubchemid"] = pubchemid
+
+        for prop in compound.get("props", {}):
+            for att in self.labels.get(prop["urn"]["label"], []):
+                if att["extra"]:
+                    if prop["urn"]["name"] == att["extra"]:
+                        result[att["code"]] = prop["value"]["sval"]
+                else:
+                    result[att["code"]] = prop["value"]["sval"]
+        return result
+
+    def parse_property_record(self, record):
+        """
+        Parse all available attributes of a single property table record.
+
+        :param record: given record of the property table
+        :return: all parsed data
+        """
+        result = dict()
+
+        pubchemid = record.get("CID", None)
+        if pubchemid:
+            result["pubchemid"] = pubchemid
+
+        for name, value in record.items():
+            code = self.properties.get(name) or self.property_aliases.get(name)
+            if code:
+                result[code] = value
         return result
+
+    @staticmethod
+    def parse_hmdbid(information):
+        """
+        Parse HMDB ID from RegistryID cross-references of a compound.
+
+        :param information: given Information record
+        :return: found HMDB ID
+        """
+        registry_ids = information.get("RegistryID", [])
+        hmdbids = [item for item in registry_ids if item.startswith("HMDB")]
+
+        if len(hmdbids) != 0:
+            return {"hmdbid": hmdbids[0]}
+        return dict()
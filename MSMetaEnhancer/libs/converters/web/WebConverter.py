@@ -1,4 +1,9 @@
-from typing import Any, Union
+import asyncio
+import json
+import time
+from contextlib import AsyncExitStack
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 import aiohttp
 from asyncstdlib import lru_cache
 from multidict import MultiDict
@@ -8,11 +13,21 @@ from asyncio.exceptions import TimeoutError
 from aiocircuitbreaker import circuit
 
 from MSMetaEnhancer.libs.Converter import Converter
+from MSMetaEnhancer.libs.utils.AdaptiveLimiter import AdaptiveLimiter
+from MSMetaEnhancer.libs.utils.Cache import PersistentCache
 from MSMetaEnhancer.libs.utils.Errors import (
     ServiceNotAvailable,
+    ServiceOverloaded,
     UnknownResponse,
     TargetAttributeNotRetrieved,
 )
+from MSMetaEnhancer.libs.utils.Json import json_loads
+from MSMetaEnhancer.libs.utils.Retry import RetryBudget, RetryPolicy
+
+# failures of a request where no response was obtained from the service
+CONNECTION_FAILURES = (ServerDisconnectedError, ClientConnectorError, TimeoutError)
+# failures of a request which are worth retrying
+RETRIED_EXCEPTIONS = CONNECTION_FAILURES + (ServiceOverloaded,)
 
 
 class WebConverter(Converter):
@@ -22,16 +37,49 @@ class WebConverter(Converter):
 
     FAILURE_THRESHOLD: int = 10
     """Number of consecutive failures before circuit breaker is opened."""
+    INITIAL_CONCURRENCY: int = 4
+    """Initial number of requests in flight allowed by the adaptive limiter."""
+    MAX_CONCURRENCY: int = 32
+    """Maximal number of requests in flight allowed by the adaptive limiter."""
+    TIMEOUT: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=60, sock_connect=10)
+    """Timeouts of a single request attempt (expired attempts are retried)."""
+    RETRY_POLICY: RetryPolicy = RetryPolicy()
+    """Number of attempts and delays between them for failed requests."""
+    BATCH_SIZE: int = 1
+    """Default maximal number of identifiers resolved by a single request
+    (by converters supporting batching), 1 disables batching."""
 
-    def __init__(self, session: aiohttp.ClientSession):
+    def __init__(
+        self, session: aiohttp.ClientSession, batch_size: Optional[int] = None
+    ):
         """Constructor for Webconverter.
 
         Args:
             session (aiohttp.ClientSession): Session to use for web IO.
+            batch_size (Optional[int]): Maximal number of identifiers resolved
+                by a single request, `BATCH_SIZE` is used if not given.
         """
         super().__init__()
         self.session: aiohttp.ClientSession = session
+        self.batch_size: int = self.BATCH_SIZE if batch_size is None else batch_size
         self.endpoints = {}
+        self.cache: Optional[PersistentCache] = None
+        # asynchronous context managers entered before every request is sent
+        self.limits: list = []
+        # number of requests in flight adapted to latency and overload signals
+        self.concurrency = AdaptiveLimiter(
+            initial=self.INITIAL_CONCURRENCY,
+            maximum=self.MAX_CONCURRENCY,
+            overload=(ServiceOverloaded, TimeoutError, ServerDisconnectedError),
+            completed=(UnknownResponse,),
+        )
+        # budget of retries (annotation runs share one among all web converters)
+        self.retry_budget = RetryBudget()
+        # functions called with the converter and success of every sent request
+        self.outcome_callbacks: list = []
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        # results of identifiers resolved in batches (by namespace and identifier)
+        self._resolved: Dict[tuple, asyncio.Future] = {}
 
     async def convert(self, source: str, target: str, data: Union[str, int, float]):
         """Convert data from source attribute to target attribute.
@@ -61,6 +109,9 @@ class WebConverter(Converter):
         Make get request to given converter with arguments.
         Raises ConnectionError if converter is not available.
 
+        Identical requests which are already in flight are not sent again,
+        the callers wait for the response of the first one instead.
+
         :param service: requested converter to be queried
         :param args: additional query arguments
         :param method: GET (default) or POST
@@ -69,13 +120,140 @@ class WebConverter(Converter):
         :return: obtained response
         """
         try:
-            result = await self.loop_request(
-                self.endpoints[service] + args, method, data, headers
-            )
-            return result
+            url = self.endpoints[service] + args
+            key = (service, args, method, data, headers)
+            task = self._in_flight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(
+                    self.fetch(service, args, url, method, data, headers)
+                )
+                self._in_flight[key] = task
+                task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            return await asyncio.shield(task)
         except TypeError:
             raise TypeError(f"Incorrect argument {args} for converter {service}.")
 
+    async def fetch(
+        self, service: str, args: str, url: str, method: str, data, headers
+    ) -> str:
+        """
+        Obtain response for given request.
+
+        If a persistent cache is set, the response is looked up there first
+        and successful responses are stored in it.
+
+        :param service: requested converter to be queried
+        :param args: additional query arguments
+        :param url: complete URL of the request
+        :param method: GET/POST
+        :param data: data for POST request
+        :param headers: optional headers for the request
+        :return: obtained response
+        """
+        if self.cache is not None:
+            result = self.cache.get(
+                self.converter_name, service, args, method, data, headers
+            )
+            if result is not None:
+                return result
+
+        result = await self.loop_request(url, method, data, headers)
+
+        if self.cache is not None:
+            self.cache.set(
+                self.converter_name, service, args, method, data, headers, result
+            )
+        return result
+
+    async def query_batch(
+        self, service: str, args: str, method: str = "GET", data=None, headers=None
+    ) -> str:
+        """
+        Make request resolving a batch of identifiers.
+
+        Batch requests bypass the caches of responses: composition of a batch depends
+        on timing, so the same batch is hardly ever requested again.
+        Results of individual identifiers are cached by `resolve_with_cache` instead.
+
+        :param service: requested converter to be queried
+        :param args: additional query arguments
+        :param method: GET (default) or POST
+        :param data: data for POST request
+        :param headers: optional headers for the request
+        :return: obtained response
+        """
+        url = self.endpoints[service] + args
+        return await self.loop_request(url, method, data, headers)
+
+    async def resolve_with_cache(
+        self,
+        namespace: str,
+        keys: List[str],
+        resolve: Callable[[List[str]], Awaitable[Dict]],
+    ) -> Dict:
+        """
+        Resolve a batch of identifiers, remembering the result of every identifier.
+
+        Results (including identifiers which were not found) are kept in memory,
+        so an identifier is resolved at most once per converter, even if it is
+        already being resolved within another batch. If the persistent cache is set,
+        it is used per identifier as well: identifiers with a cached result are not resolved
+        again and results of the others are stored one by one, so they are found by later runs
+        regardless of how the identifiers are grouped into batches.
+        Failures (exceptions) are neither remembered nor cached.
+
+        :param namespace: kind of the identifiers and requested output (part of the cache key)
+        :param keys: given list of identifiers
+        :param resolve: coroutine function mapping list of identifiers
+            to dictionary of identifier -> result (or exception)
+        :return: dictionary of identifier -> result (or exception)
+        """
+        futures, missing = dict(), dict()
+        for key in keys:
+            future = self._resolved.get((namespace, key))
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._resolved[(namespace, key)] = future
+                cached = None
+                if self.cache is not None:
+                    cached = self.cache.get(
+                        self.converter_name, namespace, key, "BATCH"
+                    )
+                if cached is None:
+                    missing[key] = future
+                else:
+                    future.set_result(json_loads(cached))
+            futures[key] = future
+
+        if missing:
+            try:
+                resolved = await resolve(list(missing))
+            except BaseException as exc:
+                for key, future in missing.items():
+                    self._resolved.pop((namespace, key), None)
+                    if isinstance(exc, Exception):
+                        future.set_result(exc)
+                    else:
+                        future.cancel()
+                raise
+            for key, future in missing.items():
+                result = resolved.get(key)
+                future.set_result(result)
+                if isinstance(result, Exception):
+                    self._resolved.pop((namespace, key), None)
+                elif result is not None and self.cache is not None:
+                    self.cache.set(
+                        self.converter_name,
+                        namespace,
+                        key,
+                        "BATCH",
+                        None,
+                        None,
+                        json.dumps(result),
+                    )
+
+        return {key: await asyncio.shield(future) for key, future in futures.items()}
+
     @circuit(
         failure_threshold=FAILURE_THRESHOLD,
         expected_exception=Union[
@@ -89,18 +267,23 @@ class WebConverter(Converter):
 
         :param url: converter URL
         :param method: GET/POST
-        :param data: given arguments for POST request
+        :param data: given arguments (or raw string body) for POST request
         :param headers: optional headers for the request
         :return: obtained response
         """
         if headers is None:
             headers = {}
         if method == "GET":
-            async with self.session.get(url, headers=headers) as response:
+            async with self.session.get(
+                url, headers=headers, timeout=self.TIMEOUT
+            ) as response:
                 return await self.process_request(response, url, method)
         else:
-            data = MultiDict(data)
-            async with self.session.post(url, data=data, headers=headers) as response:
+            if not isinstance(data, str):
+                data = MultiDict(data)
+            async with self.session.post(
+                url, data=data, headers=headers, timeout=self.TIMEOUT
+            ) as response:
                 return await self.process_request(response, url, method)
 
     async def loop_request(
@@ -110,16 +293,73 @@ class WebConverter(Converter):
         Execute request in a circuit breaker loop. If the request fails multiple times in a row,
         the circuit breaker is opened and ServiceNotAvailable exception is raised.
 
+        Failed attempts (connection errors, timeouts, overloaded service) are retried
+        with exponential backoff according to `RETRY_POLICY`, as long as `retry_budget` allows.
+        ServiceNotAvailable exception is raised once no more attempts are allowed.
+
         :param url: converter URL
         :param method: GET/POST
         :param data: given arguments for POST request
         :param headers: optional headers for the request
         :return: obtained response
         """
-        try:
-            return await self.make_request(url, method, data, headers)
-        except (ServerDisconnectedError, ClientConnectorError, TimeoutError):
-            return await self.loop_request(url, method, data, headers)
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await self.send_request(url, method, data, headers)
+            except RETRIED_EXCEPTIONS as exc:
+                attempt += 1
+                if attempt >= self.RETRY_POLICY.max_attempts:
+                    raise ServiceNotAvailable(
+                        f"Service {self.converter_name} not available after {attempt} attempts."
+                    ) from exc
+                if not self.retry_budget.withdraw():
+                    raise ServiceNotAvailable(
+                        f"Service {self.converter_name} not available, retry budget exhausted."
+                    ) from exc
+                retry_after = getattr(exc, "retry_after", None)
+                await asyncio.sleep(self.RETRY_POLICY.delay(attempt, retry_after))
+
+    async def send_request(
+        self, url: str, method: str, data: Any, headers: dict
+    ) -> str:
+        """
+        Send a single request after taking a slot of the adaptive concurrency limiter
+        and entering all limits (throttlers, semaphores) of the converter.
+        Limits are entered only once the slot is taken, so e.g. spacing of requests
+        by a throttler is kept. Only latency of the request itself is measured.
+        Whether a response was obtained is reported to `outcome_callbacks`.
+
+        :param url: converter URL
+        :param method: GET/POST
+        :param data: given arguments for POST request
+        :param headers: optional headers for the request
+        :return: obtained response
+        """
+        async with self.concurrency.hold(), AsyncExitStack() as stack:
+            for limit in self.limits:
+                await stack.enter_async_context(limit)
+            async with self.concurrency.measure():
+                try:
+                    result = await self.make_request(url, method, data, headers)
+                except CONNECTION_FAILURES:
+                    self.report_outcome(False)
+                    raise
+                except UnknownResponse:
+                    self.report_outcome(True)
+                    raise
+                self.report_outcome(True)
+                return result
+
+    def report_outcome(self, success: bool):
+        """
+        Report outcome of a request to all registered callbacks.
+
+        :param success: whether a response was obtained from the service
+        """
+        for callback in self.outcome_callbacks:
+            callback(self, success)
 
     async def process_request(
         self, response: aiohttp.ClientResponse, url: str, method: str
@@ -133,9 +373,49 @@ class WebConverter(Converter):
         :return: processed response
         """
         result = await response.text()
+        self.check_response(response, result, url, method)
+        return result
+
+    @staticmethod
+    def check_response(
+        response: aiohttp.ClientResponse, result: str, url: str, method: str
+    ):
+        """
+        Raise an exception if the response is not successful.
+
+        Raises ServiceOverloaded for 429 and 503 responses (with delay requested
+        by their Retry-After header), UnknownResponse for other failures.
+
+        :param response: given async response
+        :param result: text of the response
+        :param url: converter URL
+        :param method: GET/POST
+        """
         if response.ok:
-            return result
-        else:
-            raise UnknownResponse(
-                f"Unknown response {response.status}:{result} for {method} request on {url}."
+            return
+        message = f"Unknown response {response.status}:{result} for {method} request on {url}."
+        if response.status in (429, 503):
+            raise ServiceOverloaded(
+                message, parse_retry_after(response.headers.get("Retry-After"))
             )
+        raise UnknownResponse(message)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse Retry-After header given either in seconds or as HTTP date.
+
+    :param value: value of the header
+    :return: requested delay in seconds or None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        delay = parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, delay)
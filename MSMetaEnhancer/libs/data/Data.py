@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Dict, Iterator, List
 
 
 class Data(ABC):
@@ -23,3 +23,23 @@ class Data(ABC):
         :param metadata:
         """
         pass
+
+    def iter_metadata(self) -> Iterator[Dict]:
+        """
+        Lazily yields dictionaries containing metadata of individual records.
+
+        :return: iterator of metadata dictionaries
+        """
+        yield from self.get_metadata()
+
+    def update_metadata(self, index: int, metadata: Dict):
+        """
+        Fuse updated metadata of a single record back to its original format.
+
+        :param index: position of the record
+        :param metadata: updated metadata of the record
+        """
+        pass
+
+    def __len__(self):
+        return len(self.get_metadata())
@@ -45,6 +45,9 @@ class DataFrame(Data):
         else:
             raise UnknownFileFormat(f"Format {file_format} not supported.")
 
+    def __len__(self):
+        return len(self.df)
+
     def get_metadata(self):
         records = self.df.to_dict("records")
         return [
@@ -52,5 +55,23 @@ class DataFrame(Data):
             for record in records
         ]
 
+    def iter_metadata(self):
+        columns = list(self.df.columns)
+        for values in self.df.itertuples(index=False, name=None):
+            yield {k: v for k, v in zip(columns, values) if not is_na_value(v)}
+
     def fuse_metadata(self, metadata_list):
         self.df = pandas.DataFrame.from_dict(metadata_list)
+
+    def update_metadata(self, index, metadata):
+        row = self.df.index[index]
+        for key, value in metadata.items():
+            if key not in self.df.columns:
+                self.df[key] = None
+            if self.df.at[row, key] != value:
+                try:
+                    self.df.at[row, key] = value
+                except TypeError:
+                    # column with string dtype cannot store other values
+                    self.df[key] = self.df[key].astype(object)
+                    self.df.at[row, key] = value
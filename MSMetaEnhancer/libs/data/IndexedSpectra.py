@@ -0,0 +1,312 @@
+import mmap
+import os
+import tempfile
+from typing import Dict, List, NamedTuple, Set
+
+from matchms import Metadata
+from matchms.importing.load_from_msp import contains_metadata, parse_metadata
+
+from MSMetaEnhancer.libs.data.Data import Data
+from MSMetaEnhancer.libs.utils.Errors import UnknownFileFormat
+from MSMetaEnhancer.libs.utils.Generic import is_na_value
+
+
+class Record(NamedTuple):
+    """
+    Byte offsets of a single record in the original file.
+    """
+
+    start: int
+    """Offset of the first line of the record."""
+    peaks: int
+    """Offset of the first line of the peak block."""
+    end: int
+    """Offset just behind the peak block."""
+
+
+class IndexedSpectra(Data):
+    """
+    IndexedSpectra class represents a spectra dataset loaded without its peaks.
+
+    The file is scanned once and only metadata headers of the records are parsed,
+    peak blocks stay in the original file and are referenced by their byte offsets.
+    Loading is therefore much faster and lighter than building full matchms.Spectrum objects,
+    which is sufficient for annotation touching metadata only.
+    """
+
+    def __init__(self):
+        self.filename = None
+        self.file_format = None
+        self.metadata: List[Dict] = []
+        self.records: List[Record] = []
+        self.changed: Set[int] = set()
+
+    def __eq__(self, other):
+        return self.metadata == other.metadata
+
+    def load_data(self, filename: str, file_format: str):
+        """
+        Indexes records of given file and parses their metadata.
+
+        Supported formats: msp, mgf
+
+        :param filename: given file
+        :param file_format: format of the input file
+        """
+        scanners = {"msp": self.scan_msp, "mgf": self.scan_mgf}
+        if file_format not in scanners:
+            raise UnknownFileFormat(f"Format {file_format} not supported.")
+
+        self.filename = filename
+        self.file_format = file_format
+        self.metadata = []
+        self.records = []
+        self.changed = set()
+        with open(filename, "rb") as file:
+            for params, record in scanners[file_format](file):
+                self.metadata.append(harmonize_metadata(params))
+                self.records.append(record)
+
+    def save_data(self, filename: str, file_format: str):
+        """
+        Exports records with their current metadata to a file given by filename.
+
+        The original file is memory-mapped and spliced into the output. Records
+        with unchanged metadata are copied verbatim (consecutive ones by a single write),
+        changed records get a new header followed by their original peak block.
+        No peaks are parsed or formatted.
+
+        The output is written to a temporary file next to the target which then replaces it,
+        so the data can be saved over the original file. In that case the file is indexed again.
+
+        Supported formats: the format of the loaded file
+
+        :param filename: target file
+        :param file_format: format of the output file
+        """
+        if file_format != self.file_format:
+            raise UnknownFileFormat(f"Format {file_format} not supported.")
+
+        in_place = os.path.exists(filename) and os.path.samefile(
+            filename, self.filename
+        )
+        descriptor, temporary = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(filename)), suffix=".tmp"
+        )
+        try:
+            with open(self.filename, "rb") as source, open(descriptor, "wb") as target:
+                if self.records:
+                    with mmap.mmap(
+                        source.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as mapped:
+                        view = memoryview(mapped)
+                        try:
+                            self.splice(view, target)
+                        finally:
+                            view.release()
+            os.replace(temporary, filename)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+        if in_place:
+            self.load_data(filename, file_format)
+
+    def splice(self, source: memoryview, target):
+        """
+        Write all records to the target, copying as much as possible from the source.
+
+        Runs of unchanged records are copied including the original separators between them.
+
+        :param source: content of the original file
+        :param target: output file opened in binary mode
+        """
+        footer = self.format_footer().encode()
+        run_start = None
+
+        for index, record in enumerate(self.records):
+            if index not in self.changed:
+                if run_start is None:
+                    run_start = record.start
+                continue
+
+            if run_start is not None:
+                target.write(source[run_start : record.start])
+                run_start = None
+            target.write(self.format_header(self.metadata[index]).encode())
+            target.write(source[record.peaks : record.end])
+            target.write(footer)
+
+        if run_start is not None:
+            target.write(source[run_start:])
+
+    def format_header(self, metadata: Dict) -> str:
+        """
+        Format header of a single record in the format of the loaded file.
+
+        :param metadata: metadata of the record
+        :return: header lines of the record
+        """
+        if self.file_format == "msp":
+            return format_msp_header(metadata)
+        return format_mgf_header(metadata)
+
+    def format_footer(self) -> str:
+        """
+        Format lines following the peak block of a record in the format of the loaded file.
+
+        :return: footer lines of a record
+        """
+        if self.file_format == "msp":
+            return "\n"
+        return "END IONS\n\n"
+
+    @staticmethod
+    def scan_msp(file):
+        """
+        Scan MSP file and yield metadata parameters and offsets of its records.
+
+        A record consists of `key: value` lines followed by the peak block,
+        records are separated by empty lines.
+
+        :param file: file opened in binary mode
+        :return: iterator of (raw metadata parameters, record offsets)
+        """
+        params, start, peaks, end = {}, None, None, 0
+        position = 0
+        for line in file:
+            offset, position = position, position + len(line)
+            text = line.decode("utf-8", errors="ignore").rstrip()
+
+            if peaks is not None and (not text or contains_metadata(text)):
+                yield params, Record(start, peaks, end)
+                params, start, peaks = {}, None, None
+
+            if not text:
+                if start is not None and params.get("num peaks", "").strip() == "0":
+                    yield params, Record(start, end, end)
+                    params, start = {}, None
+                continue
+
+            if start is None:
+                start = offset
+            if peaks is None and contains_metadata(text):
+                parse_metadata(text, params)
+            elif peaks is None:
+                peaks = offset
+            end = position
+
+        if peaks is not None:
+            yield params, Record(start, peaks, end)
+        elif start is not None:
+            yield params, Record(start, end, end)
+
+    @staticmethod
+    def scan_mgf(file):
+        """
+        Scan MGF file and yield metadata parameters and offsets of its records.
+
+        A record is enclosed in `BEGIN IONS` and `END IONS` lines and consists
+        of `KEY=value` lines followed by the peak block.
+
+        :param file: file opened in binary mode
+        :return: iterator of (raw metadata parameters, record offsets)
+        """
+        params, start, peaks = {}, None, None
+        position = 0
+        for line in file:
+            offset, position = position, position + len(line)
+            text = line.decode("utf-8", errors="ignore").strip()
+
+            if text == "BEGIN IONS":
+                params, start, peaks = {}, offset, None
+            elif text == "END IONS" and start is not None:
+                yield params, Record(start, offset if peaks is None else peaks, offset)
+                start = None
+            elif start is not None and peaks is None and text:
+                key, separator, value = text.partition("=")
+                if separator and not text[0].isdigit():
+                    params[key.strip().lower()] = value.strip()
+                else:
+                    peaks = offset
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def get_metadata(self):
+        return list(self.iter_metadata())
+
+    def iter_metadata(self):
+        for metadata in self.metadata:
+            yield drop_na_values(metadata)
+
+    def fuse_metadata(self, metadata):
+        for i in range(len(metadata)):
+            self.update_metadata(i, metadata[i])
+
+    def update_metadata(self, index, metadata):
+        if metadata != drop_na_values(self.metadata[index]):
+            self.changed.add(index)
+        self.metadata[index] = metadata
+
+
+def drop_na_values(metadata: Dict) -> Dict:
+    return {k: v for k, v in metadata.items() if not is_na_value(v)}
+
+
+def harmonize_metadata(params: Dict) -> Dict:
+    """
+    Harmonise raw metadata parameters the same way matchms does when loading spectra.
+
+    :param params: raw metadata parameters
+    :return: harmonised metadata
+    """
+    if isinstance(params.get("mw"), str):
+        params["mw"] = params["mw"].replace(",", ".")
+    if isinstance(params.get("pepmass"), str):
+        try:
+            params["pepmass"] = tuple(
+                float(value) for value in params["pepmass"].split()
+            )
+        except ValueError:
+            pass
+    metadata = Metadata(params)
+    metadata.harmonize_values()
+    return metadata.to_dict()
+
+
+def format_msp_header(metadata: Dict) -> str:
+    """
+    Format MSP header of a record, following the style of matchms export.
+
+    :param metadata: metadata of the record
+    :return: header lines of the record
+    """
+    metadata = dict(metadata)
+    num_peaks = metadata.pop("num_peaks", 0)
+    metadata.pop("peak_comments", None)
+    lines = []
+    name = metadata.pop("compound_name", None)
+    if name is not None:
+        lines.append(f"NAME: {name}\n")
+    for key, value in metadata.items():
+        if not is_na_value(value):
+            lines.append(f"{key.upper()}: {value}\n")
+    lines.append(f"NUM PEAKS: {num_peaks}\n")
+    return "".join(lines)
+
+
+def format_mgf_header(metadata: Dict) -> str:
+    """
+    Format MGF header of a record.
+
+    :param metadata: metadata of the record
+    :return: header lines of the record
+    """
+    lines = ["BEGIN IONS\n"]
+    for key, value in metadata.items():
+        if isinstance(value, (tuple, list)):
+            value = " ".join(str(item) for item in value)
+        if not is_na_value(value):
+            lines.append(f"{key.upper()}={value}\n")
+    return "".join(lines)
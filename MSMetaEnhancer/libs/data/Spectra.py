@@ -58,15 +58,22 @@ class Spectra(Data):
         except Exception:
             raise UnknownFileFormat(f"Format {file_format} not supported.")
 
+    def __len__(self):
+        return len(self.spectrums)
+
     def get_metadata(self):
-        return [
-            {k: v for k, v in spectra.metadata.items() if not is_na_value(v)}
-            for spectra in self.spectrums
-        ]
+        return list(self.iter_metadata())
+
+    def iter_metadata(self):
+        for spectra in self.spectrums:
+            yield {k: v for k, v in spectra.metadata.items() if not is_na_value(v)}
 
     def fuse_metadata(self, metadata):
         for i in range(len(metadata)):
-            self.spectrums[i].metadata = metadata[i]
+            self.update_metadata(i, metadata[i])
+
+    def update_metadata(self, index, metadata):
+        self.spectrums[index].metadata = metadata
 
 
 def spectra_eq(first: Spectrum, second: Spectrum):
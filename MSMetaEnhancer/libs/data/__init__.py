@@ -1,4 +1,5 @@
 from MSMetaEnhancer.libs.data.Spectra import Spectra
 from MSMetaEnhancer.libs.data.DataFrame import DataFrame
+from MSMetaEnhancer.libs.data.IndexedSpectra import IndexedSpectra
 
-__all__ = ["Spectra", "DataFrame"]
+__all__ = ["Spectra", "DataFrame", "IndexedSpectra"]
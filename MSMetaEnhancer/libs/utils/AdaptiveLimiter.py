@@ -0,0 +1,155 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Optional, Tuple, Type
+
+
+class AdaptiveLimiter:
+    """
+    Class to limit number of requests in flight by a limit adapted to observed latency (AIMD).
+
+    While latency stays close to the lowest latency observed so far (the baseline),
+    the limit is increased additively (by one per limit of completed requests).
+    Once latency rises above `TOLERANCE` times the baseline or the service signals
+    overload (e.g. 429/503 responses, timeouts), the limit is decreased multiplicatively,
+    at most once per baseline latency, so a burst of failures counts as a single signal.
+    Requests waiting for a free slot are kept in a FIFO queue.
+    """
+
+    BACKOFF: float = 0.5
+    """Factor applied to the limit when the service is overloaded."""
+    TOLERANCE: float = 2.0
+    """Maximal ratio of latency to the baseline still considered as not overloaded."""
+    DRIFT: float = 0.01
+    """Relative growth of the baseline per slower request, so it can follow lasting changes."""
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        overload: Tuple[Type[BaseException], ...] = (),
+        completed: Tuple[Type[BaseException], ...] = (),
+    ):
+        """
+        :param initial: initial limit
+        :param minimum: minimal limit
+        :param maximum: maximal limit
+        :param overload: exceptions signalling overload of the service
+        :param completed: exceptions raised for complete (although unsuccessful) responses,
+            their latency is taken into account
+        """
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.overload = overload
+        self.completed = completed
+
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if not waiter.cancelled():
+                # the slot was already granted, give it to the next waiter
+                self.release()
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def hold(self):
+        """
+        Hold a slot without adapting the limit.
+        """
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def measure(self):
+        """
+        Adapt the limit to outcome and latency of a single request.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        except self.overload:
+            self.decrease()
+            raise
+        except self.completed:
+            self.record_latency(time.monotonic() - start)
+            raise
+        else:
+            self.record_latency(time.monotonic() - start)
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold a slot for a single request and adapt the limit to its outcome.
+        """
+        async with self.hold(), self.measure():
+            yield
+
+    def record_latency(self, latency: float):
+        """
+        Adapt the limit to latency of a completed request.
+
+        :param latency: duration of the request in seconds
+        """
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        else:
+            self.baseline *= 1 + self.DRIFT
+
+        if latency <= self.baseline * self.TOLERANCE:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+        else:
+            self.decrease()
+
+    def decrease(self):
+        """
+        Decrease the limit multiplicatively.
+        """
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline or 0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.BACKOFF)
+
+    def get_statistics(self) -> dict:
+        """
+        Report current state of the limiter.
+
+        :return: dictionary of named values
+        """
+        return {
+            "limit": int(self.limit),
+            "in flight": self.in_flight,
+            "baseline latency": None
+            if self.baseline is None
+            else round(self.baseline, 4),
+        }
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List
+
+
+class Batcher:
+    """
+    Class to collect individual requests over a short time window and resolve them together.
+
+    Requests are submitted one by one. Once `max_size` distinct keys are pending
+    or `window` seconds passed since the first of them, all pending keys are resolved
+    by a single call of `resolve`. Identical keys submitted in the meantime share the result.
+    """
+
+    def __init__(
+        self,
+        resolve: Callable[[List[Hashable]], Awaitable[Dict]],
+        max_size: int = 50,
+        window: float = 0.05,
+    ):
+        """
+        :param resolve: coroutine function mapping list of keys to dictionary of key -> result,
+            a result might be also an exception raised to the particular caller
+        :param max_size: maximal number of keys resolved together
+        :param window: maximal time (in seconds) to wait for additional keys
+        """
+        self.resolve = resolve
+        self.max_size = max_size
+        self.window = window
+
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, key: Hashable):
+        """
+        Submit a key to be resolved within the next batch.
+
+        :param key: given key
+        :return: result obtained for the key (None if the key was not resolved)
+        """
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(
+                    self.window, self.flush
+                )
+        return await asyncio.shield(future)
+
+    def flush(self):
+        """
+        Resolve all pending keys right away.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            batch, self._pending = self._pending, {}
+            task = asyncio.ensure_future(self._resolve_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve_batch(self, batch: Dict[Hashable, asyncio.Future]):
+        try:
+            results = await self.resolve(list(batch))
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for key, future in batch.items():
+            if future.done():
+                continue
+            result = results.get(key)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
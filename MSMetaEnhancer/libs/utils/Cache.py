@@ -0,0 +1,180 @@
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from typing import Optional
+
+
+class PersistentCache:
+    """
+    Persistent on-disk cache of web service responses backed by SQLite.
+
+    Responses are keyed by converter, endpoint, query arguments, method, POST data
+    and headers, so repeated runs over the same data do not have to query the services again.
+    Payloads are stored compressed, entries expire after a (per-converter) time to live
+    and the least recently used entries are evicted once the size cap is reached.
+    """
+
+    COMMIT_INTERVAL: int = 100
+    """Number of writes after which the changes are committed to the disk."""
+
+    def __init__(
+        self,
+        filename: str,
+        ttl: dict = None,
+        default_ttl: Optional[float] = None,
+        max_entries: int = 1_000_000,
+        compression_level: int = 6,
+    ):
+        """
+        :param filename: path to the SQLite database file (created if it does not exist)
+        :param ttl: time to live in seconds for particular converters, e.g. {"PubChem": 86400}
+        :param default_ttl: time to live in seconds for other converters, None means no expiration
+        :param max_entries: maximal number of stored responses
+        :param compression_level: zlib compression level of stored payloads
+        """
+        self.filename = filename
+        self.ttl = dict(ttl or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.compression_level = compression_level
+
+        self.hits = Counter()
+        self.misses = Counter()
+        self._pending_writes = 0
+
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, converter TEXT, created REAL, accessed REAL, payload BLOB)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+        )
+        self.connection.commit()
+        self.size = self.connection.execute(
+            "SELECT COUNT(*) FROM responses"
+        ).fetchone()[0]
+
+    @staticmethod
+    def make_key(converter, service, args, method, data, headers) -> str:
+        """
+        Compute unique key of a request.
+
+        :param converter: name of the converter
+        :param service: queried endpoint of the converter
+        :param args: query arguments
+        :param method: GET/POST
+        :param data: data (or raw string body) for POST request
+        :param headers: headers of the request
+        :return: hash identifying the request
+        """
+        request = [
+            converter,
+            service,
+            args,
+            method,
+            (data if isinstance(data, str) else dict(data)) if data else None,
+            dict(headers) if headers else None,
+        ]
+        return hashlib.sha256(
+            json.dumps(request, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def get_ttl(self, converter: str) -> Optional[float]:
+        return self.ttl.get(converter, self.default_ttl)
+
+    def get(self, converter, service, args, method="GET", data=None, headers=None):
+        """
+        Look up stored response of given request.
+
+        :return: stored response or None if it is not present or already expired
+        """
+        key = self.make_key(converter, service, args, method, data, headers)
+        row = self.connection.execute(
+            "SELECT created, payload FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+
+        if row is not None:
+            created, payload = row
+            ttl = self.get_ttl(converter)
+            if ttl is None or now - created <= ttl:
+                self.connection.execute(
+                    "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+                )
+                self._register_write()
+                self.hits[converter] += 1
+                return zlib.decompress(payload).decode()
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.size -= 1
+            self._register_write()
+
+        self.misses[converter] += 1
+        return None
+
+    def set(self, converter, service, args, method, data, headers, response: str):
+        """
+        Store response of given request.
+        """
+        key = self.make_key(converter, service, args, method, data, headers)
+        now = time.time()
+        payload = zlib.compress(response.encode(), self.compression_level)
+
+        cursor = self.connection.execute(
+            "UPDATE responses SET created = ?, accessed = ?, payload = ? WHERE key = ?",
+            (now, now, payload, key),
+        )
+        if cursor.rowcount == 0:
+            self.connection.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, converter, now, now, payload),
+            )
+            self.size += 1
+            if self.size > self.max_entries:
+                self.evict(self.size - self.max_entries)
+        self._register_write()
+
+    def evict(self, count: int):
+        """
+        Remove given number of least recently used entries.
+
+        :param count: number of entries to remove
+        """
+        self.connection.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+            (count,),
+        )
+        self.size = max(self.size - count, 0)
+
+    def _register_write(self):
+        self._pending_writes += 1
+        if self._pending_writes >= self.COMMIT_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """
+        Commit all pending changes to the disk.
+        """
+        self.connection.commit()
+        self._pending_writes = 0
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def get_statistics(self) -> dict:
+        """
+        Compute hit and miss counts of individual converters.
+
+        :return: dictionary of converter name to its counts
+        """
+        return {
+            converter: {"hits": self.hits[converter], "misses": self.misses[converter]}
+            for converter in sorted(set(self.hits) | set(self.misses))
+        }
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from MSMetaEnhancer.libs.utils.Delta import metadata_delta
+from MSMetaEnhancer.libs.utils.Errors import CheckpointMismatch
+from MSMetaEnhancer.libs.utils.Job import Job
+from MSMetaEnhancer.libs.utils.Json import json_loads
+
+
+class Checkpoint:
+    """
+    Append-only checkpoint of records which were already annotated.
+
+    Every completed record is appended to a JSON lines file as its index, fingerprint
+    of its input metadata and the attributes added by the annotation, e.g.
+    `{"index": 2, "fingerprint": "ab12...", "metadata": {"smiles": "C"}}`.
+    Records are stored even if nothing was added, so they are not annotated again.
+    The first line holds fingerprint of the executed jobs and used converters,
+    e.g. `{"fingerprint": "cd34..."}`. Resuming with different jobs or converters,
+    or with records not matching the stored ones (different or reordered input file),
+    raises CheckpointMismatch instead of applying results of other records.
+
+    Entries of an existing file are loaded when the checkpoint is opened, an incomplete
+    last line (left by an interrupted run) is ignored.
+    """
+
+    FLUSH_INTERVAL: int = 100
+    """Number of written records after which the file is flushed to the disk."""
+
+    def __init__(self, filename: str):
+        """
+        :param filename: path to the checkpoint file (created if it does not exist)
+        """
+        self.filename = filename
+        self.context: Optional[str] = None
+        self.completed: Dict[int, Dict] = dict()
+        self.fingerprints: Dict[int, str] = dict()
+        self._pending_writes = 0
+
+        needs_newline = False
+        if os.path.exists(filename):
+            with open(filename, encoding="utf-8") as file:
+                for line in file:
+                    needs_newline = not line.endswith("\n")
+                    try:
+                        entry = json_loads(line)
+                    except ValueError:
+                        continue
+                    if "index" in entry:
+                        self.completed[entry["index"]] = entry["metadata"]
+                        self.fingerprints[entry["index"]] = entry.get("fingerprint")
+                    else:
+                        self.context = entry["fingerprint"]
+
+        self.file = open(filename, "a", encoding="utf-8")
+        if needs_newline:
+            self.file.write("\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __contains__(self, index: int):
+        return index in self.completed
+
+    @staticmethod
+    def fingerprint(metadata: Dict) -> str:
+        """
+        Compute fingerprint of metadata of a record (or of the annotation context).
+
+        :param metadata: given metadata
+        :return: hash identifying the metadata
+        """
+        content = json.dumps(metadata, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def start(
+        self,
+        jobs: List[Job],
+        converters: List[str],
+        records: Iterable[Dict],
+        resume: bool,
+    ):
+        """
+        Prepare the checkpoint for a run with given jobs, converters and input records.
+
+        Raises CheckpointMismatch if the stored records were annotated by different jobs
+        or converters (or their fingerprint is missing) or they differ from given records
+        and they should be resumed. Everything is checked here, before any record is annotated.
+
+        :param jobs: executed jobs
+        :param converters: names of used converters
+        :param records: metadata of input records before the annotation
+        :param resume: whether stored records are going to be used, otherwise they are removed
+        """
+        jobs = [(job.source, job.target, job.converter) for job in jobs]
+        context = self.fingerprint([jobs, sorted(converters)])
+        if not resume:
+            self.clear()
+        elif self.context != context and (self.context or self.completed):
+            raise CheckpointMismatch(
+                f"Checkpoint {self.filename} was created for different jobs or converters."
+            )
+        else:
+            self.validate(records)
+        if self.context is None:
+            self.context = context
+            self.file.write(json.dumps({"fingerprint": context}) + "\n")
+
+    def validate(self, records: Iterable[Dict]):
+        """
+        Check that stored records match given input records.
+
+        Raises CheckpointMismatch if a record differs from the stored one
+        or a stored record is missing in the input.
+
+        :param records: metadata of input records before the annotation
+        """
+        remaining = set(self.completed)
+        for index, metadata in enumerate(records):
+            if index in remaining:
+                if self.fingerprints.get(index) != self.fingerprint(metadata):
+                    break
+                remaining.discard(index)
+        if remaining:
+            raise CheckpointMismatch(
+                f"Record {min(remaining)} does not match checkpoint {self.filename}, "
+                "it was created for different input data."
+            )
+
+    def restore(self, index: int, metadata: Dict) -> Dict:
+        """
+        Apply stored result of a completed record.
+
+        :param index: position of the record
+        :param metadata: metadata of the record before the annotation
+        :return: annotated metadata of the record
+        """
+        return {**metadata, **self.completed[index]}
+
+    def write(self, index: int, original: Dict, annotated: Dict):
+        """
+        Store result of a completed record.
+
+        :param index: position of the record
+        :param original: metadata before the annotation
+        :param annotated: metadata after the annotation
+        """
+        delta = metadata_delta(original, annotated)
+        fingerprint = self.fingerprint(original)
+        self.completed[index] = delta
+        self.fingerprints[index] = fingerprint
+        entry = {"index": index, "fingerprint": fingerprint, "metadata": delta}
+        self.file.write(json.dumps(entry, default=str) + "\n")
+
+        self._pending_writes += 1
+        if self._pending_writes >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def clear(self):
+        """
+        Remove all stored records.
+        """
+        self.context = None
+        self.completed = dict()
+        self.fingerprints = dict()
+        self.file.truncate(0)
+        self._pending_writes = 0
+
+    def flush(self):
+        """
+        Flush all pending records to the disk.
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self._pending_writes = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
@@ -0,0 +1,101 @@
+from typing import Dict, List
+
+import aiohttp
+
+
+class ConnectionPool:
+    """
+    Connection layer of web converters.
+
+    Every web converter gets its own session with its own connector, so a slow service
+    cannot occupy connections needed by the other ones. Connections to the service are limited
+    by `MAX_CONCURRENCY` of the converter (the most requests it ever has in flight),
+    idle connections are kept alive to be reused by subsequent requests and resolved
+    host names are cached. Creation and reuse of connections is counted for every converter.
+    """
+
+    def __init__(self, keepalive_timeout: float = 30.0, ttl_dns_cache: int = 300):
+        """
+        :param keepalive_timeout: time (in seconds) an idle connection is kept open
+        :param ttl_dns_cache: time (in seconds) resolved host names are cached
+        """
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.sessions: List[aiohttp.ClientSession] = []
+        self.statistics: Dict[str, Dict[str, int]] = dict()
+
+    def get_session(self, converter_class: type) -> aiohttp.ClientSession:
+        """
+        Create a session for given web converter.
+
+        :param converter_class: class of the web converter
+        :return: session with connector limited for the converter
+        """
+        connections = converter_class.MAX_CONCURRENCY
+        connector = aiohttp.TCPConnector(
+            limit=connections,
+            limit_per_host=connections,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=converter_class.TIMEOUT,
+            trace_configs=[self.trace_config(converter_class.__name__)],
+        )
+        self.sessions.append(session)
+        return session
+
+    def trace_config(self, name: str) -> aiohttp.TraceConfig:
+        """
+        Create tracing of connections used by a session.
+
+        :param name: name the statistics are collected under
+        :return: trace config counting connections
+        """
+        statistics = self.statistics.setdefault(
+            name,
+            {
+                "requests": 0,
+                "new connections": 0,
+                "reused connections": 0,
+                "DNS cache hits": 0,
+                "DNS cache misses": 0,
+            },
+        )
+
+        def counter(key):
+            async def count(session, context, params):
+                statistics[key] += 1
+
+            return count
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(counter("requests"))
+        trace_config.on_connection_create_end.append(counter("new connections"))
+        trace_config.on_connection_reuseconn.append(counter("reused connections"))
+        trace_config.on_dns_cache_hit.append(counter("DNS cache hits"))
+        trace_config.on_dns_cache_miss.append(counter("DNS cache misses"))
+        return trace_config
+
+    async def close(self):
+        """
+        Close all created sessions together with their connections.
+        """
+        for session in self.sessions:
+            await session.close()
+        self.sessions = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def get_statistics(self) -> Dict[str, Dict[str, int]]:
+        """
+        Report usage of connections by every converter.
+
+        :return: dictionary of converter name to its named values
+        """
+        return self.statistics
@@ -1,5 +1,6 @@
 from MSMetaEnhancer.libs.converters.web.WebConverter import WebConverter
 from MSMetaEnhancer.libs.converters.compute.ComputeConverter import ComputeConverter
+from MSMetaEnhancer.libs.utils.Connection import ConnectionPool
 from MSMetaEnhancer.libs.utils.Errors import UnknownConverter
 
 
@@ -24,20 +25,34 @@ class ConverterBuilder:
                 raise UnknownConverter(f"Converter {converter} unknown.")
 
     @staticmethod
-    def build_converters(session, converters: list[str]):
+    def build_converters(
+        session,
+        converters: list[str],
+        pool: ConnectionPool = None,
+        batch_sizes: dict[str, int] = None,
+    ):
         """
         Create provided converters.
 
         :param session: given aiohttp session
         :param converters: list of converters to be built
+        :param pool: optional connection pool, web converters get their own sessions
+            from it instead of the given session
+        :param batch_sizes: optional batch sizes of particular web converters, e.g. {"PubChem": 50}
         :return: built converters
         """
+        batch_sizes = batch_sizes or {}
         web_converters, compute_converters = {}, {}
         for converter in converters:
-            if issubclass(ConverterBuilder.converters[converter], WebConverter):
-                web_converters[converter] = ConverterBuilder.converters[converter](
-                    session
+            converter_class = ConverterBuilder.converters[converter]
+            if issubclass(converter_class, WebConverter):
+                options = {}
+                if converter in batch_sizes:
+                    options["batch_size"] = batch_sizes[converter]
+                web_converters[converter] = converter_class(
+                    session if pool is None else pool.get_session(converter_class),
+                    **options,
                 )
-            elif issubclass(ConverterBuilder.converters[converter], ComputeConverter):
-                compute_converters[converter] = ConverterBuilder.converters[converter]()
+            elif issubclass(converter_class, ComputeConverter):
+                compute_converters[converter] = converter_class()
         return compute_converters, web_converters
@@ -0,0 +1,67 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from MSMetaEnhancer.libs.utils import logger
+from MSMetaEnhancer.libs.utils.Delta import metadata_delta
+from MSMetaEnhancer.libs.utils.Job import Job
+
+
+class Deduplicator:
+    """
+    Deduplicator shares annotation among records describing the same compound.
+
+    Records are grouped by values of all attributes used by the jobs (both sources and targets),
+    as these fully determine the outcome of the annotation. Only the first record of each group
+    (its representative) is actually annotated, attributes added to it are applied to all
+    other members of the group. The amount of work therefore scales with the number
+    of unique compounds instead of the number of records.
+    """
+
+    def __init__(self, jobs: List[Job]):
+        """
+        :param jobs: executed jobs
+        """
+        self.attributes = sorted(
+            {job.source for job in jobs} | {job.target for job in jobs}
+        )
+        self.groups: Dict[Tuple, asyncio.Future] = dict()
+
+    def group_key(self, metadata: Dict) -> Tuple:
+        """
+        Compute key of the group given record belongs to.
+
+        :param metadata: metadata of the record
+        :return: values of attributes used by the jobs
+        """
+        return tuple(repr(metadata.get(attribute)) for attribute in self.attributes)
+
+    async def annotate(
+        self, metadata: Dict, annotate: Callable[[Dict], Awaitable[Dict]]
+    ) -> Dict:
+        """
+        Annotate a record, sharing the annotation with other members of its group.
+
+        :param metadata: metadata of the record
+        :param annotate: coroutine function annotating a single record
+        :return: annotated metadata
+        """
+        key = self.group_key(metadata)
+        future = self.groups.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self.annotate_representative(metadata, annotate)
+            )
+            self.groups[key] = future
+            return {**metadata, **await asyncio.shield(future)}
+
+        logger.add_coverage_before(metadata.keys())
+        metadata = {**metadata, **await asyncio.shield(future)}
+        logger.add_coverage_after(metadata.keys())
+        return metadata
+
+    @staticmethod
+    async def annotate_representative(
+        metadata: Dict, annotate: Callable[[Dict], Awaitable[Dict]]
+    ) -> Dict:
+        annotated = await annotate(dict(metadata))
+        return metadata_delta(metadata, annotated)
@@ -0,0 +1,116 @@
+import json
+from typing import Dict, Iterator, Optional
+
+from MSMetaEnhancer.libs.data.Data import Data
+from MSMetaEnhancer.libs.utils.Generic import is_na_value
+from MSMetaEnhancer.libs.utils.Json import json_loads
+
+
+def metadata_delta(original: Dict, annotated: Dict) -> Dict:
+    """
+    Compute attributes which were added or changed by the annotation.
+
+    Missing (None/NA) values are not considered to be added.
+
+    :param original: metadata before the annotation
+    :param annotated: metadata after the annotation
+    :return: dictionary of new or changed attributes
+    """
+    return {
+        key: value
+        for key, value in annotated.items()
+        if (key not in original or original[key] != value) and not is_na_value(value)
+    }
+
+
+class DeltaWriter:
+    """
+    Writer of a metadata delta sidecar.
+
+    The sidecar is a JSON lines file where each line holds attributes
+    added or changed in a single record, together with the record index and
+    (optionally) its identifier, e.g.
+    `{"index": 2, "id": "3", "metadata": {"smiles": "C"}}`.
+    Records without any change are not written at all.
+    """
+
+    def __init__(self, filename: str, key: Optional[str] = None):
+        """
+        :param filename: path to the sidecar file
+        :param key: attribute identifying records (e.g. "id"), if not given only indices are stored
+        """
+        self.filename = filename
+        self.key = key
+        self.file = open(filename, "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, index: int, original: Dict, annotated: Dict):
+        """
+        Write changes of a single record.
+
+        :param index: position of the record
+        :param original: metadata before the annotation
+        :param annotated: metadata after the annotation
+        """
+        delta = metadata_delta(original, annotated)
+        if not delta:
+            return
+        entry = {"index": index}
+        if self.key is not None:
+            entry["id"] = original.get(self.key)
+        entry["metadata"] = delta
+        self.file.write(json.dumps(entry, default=str) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_delta(filename: str) -> Iterator[Dict]:
+    """
+    Read entries of a metadata delta sidecar.
+
+    :param filename: path to the sidecar file
+    :return: iterator of entries with keys "index", "metadata" and optionally "id"
+    """
+    with open(filename, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json_loads(line)
+
+
+def apply_delta(data: Data, filename: str, key: Optional[str] = None) -> int:
+    """
+    Merge a metadata delta sidecar into given data.
+
+    :param data: given data (typically loaded from the original file)
+    :param filename: path to the sidecar file
+    :param key: attribute identifying records, if not given records are matched by index
+    :return: number of updated records
+    """
+    metadata = data.get_metadata()
+    if key is None:
+        positions = {index: index for index in range(len(metadata))}
+    else:
+        positions = {
+            record[key]: index
+            for index, record in enumerate(metadata)
+            if record.get(key) is not None
+        }
+
+    updated = 0
+    for entry in read_delta(filename):
+        index = positions.get(entry["index"] if key is None else entry.get("id"))
+        if index is None:
+            continue
+        metadata[index].update(entry["metadata"])
+        data.update_metadata(index, metadata[index])
+        updated += 1
+    return updated
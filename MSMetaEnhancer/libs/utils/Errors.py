@@ -31,6 +31,22 @@ class UnknownResponse(Exception):
     pass
 
 
+class ServiceOverloaded(UnknownResponse):
+    """
+    Service responded by 429 (Too Many Requests) or 503 (Service Unavailable).
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CheckpointMismatch(Exception):
+    """Checkpoint was created for different input data or jobs."""
+
+    pass
+
+
 class InvalidAttributeFormat(Exception):
     pass
 
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from MSMetaEnhancer.libs.utils.Delta import metadata_delta
+from MSMetaEnhancer.libs.utils.Job import Job
+from MSMetaEnhancer.libs.utils.Json import json_loads
+
+
+class IncrementalState:
+    """
+    State of incremental annotation, allowing to skip records unchanged since the last run.
+
+    Each record is identified by a fingerprint of its input metadata, executed jobs
+    and used converters. The state file (JSON lines) maps fingerprints of records
+    annotated in the last run to attributes added to them, e.g.
+    `{"fingerprint": "ab12...", "metadata": {"smiles": "C"}}`.
+    Records with a known fingerprint get these attributes without being annotated again,
+    new or changed records (and all records after jobs or converters changed) are annotated.
+    """
+
+    def __init__(self, filename: str):
+        """
+        :param filename: path to the state file (created if it does not exist)
+        """
+        self.filename = filename
+        self.previous: Dict[str, Dict] = dict()
+        self.current: Dict[str, Dict] = dict()
+        self.context = ""
+
+        if os.path.exists(filename):
+            with open(filename, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json_loads(line)
+                        self.previous[entry["fingerprint"]] = entry["metadata"]
+
+    def set_context(self, jobs: List[Job], converters: List[str]):
+        """
+        Set jobs and converters of the current run, which are part of every fingerprint.
+
+        :param jobs: executed jobs
+        :param converters: names of used converters
+        """
+        jobs = [(job.source, job.target, job.converter) for job in jobs]
+        self.context = json.dumps([jobs, sorted(converters)])
+
+    def fingerprint(self, metadata: Dict) -> str:
+        """
+        Compute fingerprint of a record in the current context.
+
+        :param metadata: input metadata of the record
+        :return: hash identifying the record
+        """
+        content = json.dumps(metadata, sort_keys=True, default=str)
+        return hashlib.sha256((self.context + content).encode()).hexdigest()
+
+    def restore(self, fingerprint: str, metadata: Dict) -> Optional[Dict]:
+        """
+        Apply result of the last run if the record did not change since then.
+
+        :param fingerprint: fingerprint of the record
+        :param metadata: input metadata of the record
+        :return: annotated metadata or None if the record has to be annotated
+        """
+        delta = self.previous.get(fingerprint)
+        if delta is None:
+            return None
+        return {**metadata, **delta}
+
+    def update(self, fingerprint: str, original: Dict, annotated: Dict):
+        """
+        Store result of a record annotated in the current run.
+
+        :param fingerprint: fingerprint of the record
+        :param original: input metadata of the record
+        :param annotated: metadata after the annotation
+        """
+        self.current[fingerprint] = metadata_delta(original, annotated)
+
+    def save(self):
+        """
+        Replace the state file by records of the current run.
+        """
+        temporary = self.filename + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            for fingerprint, delta in self.current.items():
+                entry = {"fingerprint": fingerprint, "metadata": delta}
+                file.write(json.dumps(entry, default=str) + "\n")
+        os.replace(temporary, self.filename)
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from typing import Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+LARGE_DOCUMENT: int = 256 * 1024
+"""Size (in characters) of documents which are decoded incrementally."""
+
+_decoder = json.JSONDecoder()
+_whitespace = " \t\n\r"
+
+
+def json_loads(text: str):
+    """
+    Decode JSON document, using orjson if it is installed.
+
+    :param text: given JSON document
+    :return: decoded object
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _skip_whitespace(text: str, index: int) -> int:
+    while index < len(text) and text[index] in _whitespace:
+        index += 1
+    return index
+
+
+def _locate(text: str, path: Tuple[str, ...]) -> Optional[int]:
+    """
+    Locate value stored in given document under given path, walking the enclosing objects.
+    Values of other keys are decoded and skipped.
+
+    :param text: given JSON document
+    :param path: keys leading to the value
+    :return: index of the value or None if the document does not have the expected structure
+    """
+    index = 0
+    for key in path:
+        index = _skip_whitespace(text, index)
+        if not text.startswith("{", index):
+            return None
+        index = _skip_whitespace(text, index + 1)
+        while True:
+            if not text.startswith('"', index):
+                return None
+            name, index = _decoder.raw_decode(text, index)
+            index = _skip_whitespace(text, index)
+            if not text.startswith(":", index):
+                raise json.JSONDecodeError("Expecting ':' delimiter", text, index)
+            index = _skip_whitespace(text, index + 1)
+            if name == key:
+                break
+            _, index = _decoder.raw_decode(text, index)
+            index = _skip_whitespace(text, index)
+            if not text.startswith(",", index):
+                return None
+            index = _skip_whitespace(text, index + 1)
+    return index
+
+
+def iter_json_array(text: str, path: Tuple[str, ...]) -> Iterator:
+    """
+    Incrementally decode items of a JSON array stored in given document under given path.
+
+    The array is located by walking the objects along the path and its items are decoded
+    one by one, so the whole document is never decoded at once. If the array cannot be located,
+    the document is decoded completely instead. Malformed (e.g. truncated) documents
+    raise JSONDecodeError.
+
+    :param text: given JSON document
+    :param path: keys leading to the array, e.g. ("results", "bindings")
+    :return: iterator over the items of the array
+    """
+    index = _locate(text, path)
+    if index is None or not text.startswith("[", index):
+        data = json_loads(text)
+        for key in path:
+            data = data[key]
+        yield from data
+        return
+
+    index = _skip_whitespace(text, index + 1)
+    if text.startswith("]", index):
+        return
+    while True:
+        item, index = _decoder.raw_decode(text, index)
+        yield item
+        index = _skip_whitespace(text, index)
+        if text.startswith("]", index):
+            return
+        if not text.startswith(",", index):
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
+        index = _skip_whitespace(text, index + 1)
+
+
+async def load_json_array(text: str, path: Tuple[str, ...], chunk_size: int = 1000):
+    """
+    Decode items of a JSON array stored in given document under given path
+    without blocking the event loop for long time.
+
+    Small documents are decoded at once, large documents are decoded incrementally
+    and control is given back to the event loop after every chunk of items.
+
+    :param text: given JSON document
+    :param path: keys leading to the array, e.g. ("results", "bindings")
+    :param chunk_size: number of items decoded between giving control back to the event loop
+    :return: list of the items
+    """
+    if len(text) < LARGE_DOCUMENT:
+        data = json_loads(text)
+        for key in path:
+            data = data[key]
+        return data
+
+    items = []
+    for item in iter_json_array(text, path):
+        items.append(item)
+        if len(items) % chunk_size == 0:
+            await asyncio.sleep(0)
+    return items
@@ -1,6 +1,8 @@
 import logging
 from datetime import datetime
-from typing import List
+from typing import Dict, List
+
+from tabulate import tabulate
 
 from MSMetaEnhancer.libs.utils.LogRecord import LogRecord
 from MSMetaEnhancer.libs.utils.Metrics import Metrics
@@ -90,3 +92,25 @@ class Logger:
         Write obtained statistical values.
         """
         self.logger.info(str(self.metrics))
+
+    def write_statistics(
+        self, title: str, statistics: Dict[str, Dict], label: str = "Converter"
+    ):
+        """
+        Write per-converter statistical values as a table.
+
+        :param title: title of the table
+        :param statistics: dictionary of converter name to its named values
+        :param label: header of the first column
+        """
+        if not statistics:
+            return
+        headers = list(next(iter(statistics.values())).keys())
+        table = tabulate(
+            [
+                [converter] + [values.get(header) for header in headers]
+                for converter, values in statistics.items()
+            ],
+            headers=[label] + headers,
+        )
+        self.logger.info(f"\n{title}:\n\n{table}\n" + "=" * 50 + "\n")
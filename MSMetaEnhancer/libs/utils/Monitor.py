@@ -1,22 +1,48 @@
-from threading import Thread, Event
-from urllib.parse import urlparse
+import asyncio
 import time
-import requests
+from typing import Dict, Optional
+from urllib.parse import urlparse
 
+import aiohttp
 
-class Monitor(Thread):
+
+class Monitor:
     """
-    Class to periodically monitor status of used web.
+    Class to monitor status of used web services.
+
+    Availability of a converter follows outcomes of its real requests (passive health):
+    it becomes unavailable after `FAILURE_THRESHOLD` consecutive failed attempts
+    (connection errors, timeouts) and available again after a successful one.
+    Additionally, base URLs of all services are probed concurrently every `INTERVAL` seconds
+    through the sessions of the converters, so an unavailable service is detected
+    even before it is used and a recovered one is used again.
+
+    Converters are considered available until proven otherwise,
+    so the annotation does not wait for the first probe.
+    A failed probe is ignored while the converter has requests in flight and one of its
+    requests succeeded within the last `INTERVAL` seconds, as the probe shares
+    the connection pool with them and may time out only waiting for a free connection.
     """
 
+    INTERVAL: float = 10.0
+    """Time (in seconds) between two probes of the services."""
+    TIMEOUT: float = 5.0
+    """Time (in seconds) to wait for response to a probe."""
+    FAILURE_THRESHOLD: int = 3
+    """Number of consecutive failed requests before the service is considered unavailable."""
+
     def __init__(self):
-        super(Monitor, self).__init__()
         self.converters = dict()
-        self.stop_request = Event()
-        self.first_check = Event()
+        self.failures: Dict[str, int] = dict()
+        self.last_success: Dict[str, float] = dict()
+        self.task: Optional[asyncio.Task] = None
 
     def set_converters(self, converters):
         self.converters = converters
+        self.failures = {name: 0 for name in converters}
+        self.last_success = dict()
+        for converter in converters.values():
+            converter.outcome_callbacks.append(self.record_outcome)
 
     @staticmethod
     def get_base_url(converter):
@@ -29,38 +55,92 @@ class Monitor(Thread):
         url = urlparse(list(converter.endpoints.values())[0])
         return url.scheme + "://" + url.netloc
 
-    @staticmethod
-    def check_service(url):
+    async def check_service(self, converter) -> bool:
         """
-        Send a GET request to given URL with 5 sec timeout.
+        Send a GET request to base URL of given converter through its session.
 
-        :param url: given URL
+        :param converter: given converter
         :return: True if request is successful with status code 200
         """
         try:
-            result = requests.get(url, timeout=5)
-            return result.status_code == 200
-        except (
-            requests.exceptions.ConnectionError,
-            TimeoutError,
-            requests.exceptions.ReadTimeout,
-        ):
+            async with converter.session.get(
+                self.get_base_url(converter),
+                timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+            ) as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
             return False
 
-    def run(self):
+    async def check_services(self):
+        """
+        Probe all services concurrently and update their availability.
+        """
+        converters = list(self.converters.items())
+        results = await asyncio.gather(
+            *[self.check_service(converter) for _, converter in converters]
+        )
+        for (name, converter), available in zip(converters, results):
+            if not available and self.is_busy(name, converter):
+                continue
+            converter.is_available = available
+            if available:
+                self.failures[name] = 0
+
+    def is_busy(self, name: str, converter) -> bool:
         """
-        Main loop of the Monitor thread.
+        Check whether real requests of given converter are in flight and succeeding.
 
-        Monitor checks if GET on base URL of every converter give status code 200.
-        Such a converter is considered available.
-        This is checked periodically to always have up-to-date information.
+        :param name: name of the converter
+        :param converter: given converter
+        :return: True if a request succeeded recently and others are in flight
         """
-        while not self.stop_request.is_set():
-            for converter in self.converters.values():
-                url = self.get_base_url(converter)
-                converter.is_available = self.check_service(url)
-            self.first_check.set()
-            time.sleep(10)
+        last_success = self.last_success.get(name, float("-inf"))
+        return (
+            time.monotonic() - last_success < self.INTERVAL
+            and converter.concurrency.in_flight > 0
+        )
 
-    def join(self, timeout=None):
-        self.stop_request.set()
+    def record_outcome(self, converter, success: bool):
+        """
+        Update availability of a converter by outcome of its request.
+
+        :param converter: converter which sent the request
+        :param success: whether a response was obtained
+        """
+        name = converter.converter_name
+        if success:
+            self.failures[name] = 0
+            self.last_success[name] = time.monotonic()
+            converter.is_available = True
+        else:
+            self.failures[name] = self.failures.get(name, 0) + 1
+            if self.failures[name] >= self.FAILURE_THRESHOLD:
+                converter.is_available = False
+
+    async def run(self):
+        """
+        Main loop of the Monitor, probing the services periodically.
+        """
+        while True:
+            await self.check_services()
+            await asyncio.sleep(self.INTERVAL)
+
+    def start(self):
+        """
+        Start probing the services in the background (within the running event loop).
+        """
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        """
+        Stop probing the services and wait until the probes are finished.
+        """
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
@@ -0,0 +1,35 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Tuple
+
+
+async def annotate_in_order(
+    annotate: Callable[[int, Dict], Awaitable[Dict]],
+    records: Iterable[Dict],
+    window: int,
+) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Annotate records with bounded number of records in flight and yield them in the input order.
+
+    Records are taken lazily from the given iterable, so at most `window` records
+    are being annotated (or waiting to be yielded) at any time.
+
+    :param annotate: coroutine function annotating a single record given its index and metadata
+    :param records: iterable of metadata records
+    :param window: maximal number of records annotated at once
+    :return: asynchronous iterator of (record index, annotated metadata)
+    """
+    pending = deque()
+    try:
+        for index, metadata in enumerate(records):
+            pending.append((index, asyncio.ensure_future(annotate(index, metadata))))
+            if len(pending) >= window:
+                index, task = pending.popleft()
+                yield index, await task
+
+        while pending:
+            index, task = pending.popleft()
+            yield index, await task
+    finally:
+        for _, task in pending:
+            task.cancel()
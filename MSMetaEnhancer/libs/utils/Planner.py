@@ -0,0 +1,187 @@
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from MSMetaEnhancer.libs.Converter import Converter
+from MSMetaEnhancer.libs.converters.compute.ComputeConverter import ComputeConverter
+from MSMetaEnhancer.libs.utils.Job import Job
+from MSMetaEnhancer.libs.utils.Throttler import Throttler
+
+
+class JobPlanner:
+    """
+    JobPlanner captures dependencies between jobs given by their source and target attributes.
+
+    Jobs form a graph where an edge leads from the source attribute to the target attribute
+    of every job. The planner is used to find out which jobs might become executable
+    once particular attributes were obtained, so only these have to be executed again.
+    """
+
+    def __init__(self, jobs: List[Job]):
+        """
+        :param jobs: list of jobs (typically created from Converter.get_conversion_functions)
+        """
+        self.jobs = list(jobs)
+        self.by_source: Dict[str, List[int]] = defaultdict(list)
+        self.by_converter: Dict[str, List[int]] = defaultdict(list)
+
+        for index, job in enumerate(self.jobs):
+            self.by_source[job.source].append(index)
+            self.by_converter[job.converter].append(index)
+
+    @property
+    def graph(self) -> Dict[str, Set[str]]:
+        """
+        Graph of attributes, where each source attribute leads to attributes computable from it.
+
+        :return: dictionary of source attribute -> set of target attributes
+        """
+        graph = defaultdict(set)
+        for job in self.jobs:
+            graph[job.source].add(job.target)
+        return dict(graph)
+
+    def triggered_by(self, attributes: Iterable[str]) -> List[int]:
+        """
+        Find jobs using any of given attributes as their source.
+
+        :param attributes: newly obtained attributes
+        :return: sorted positions of the jobs in the job list
+        """
+        indices = set()
+        for attribute in attributes:
+            indices.update(self.by_source.get(attribute, []))
+        return sorted(indices)
+
+    def triggered_by_cache(
+        self, converter: str, attributes: Iterable[str]
+    ) -> List[int]:
+        """
+        Find jobs of given converter targeting any of given attributes.
+
+        Such jobs can be satisfied from the converter cache once these attributes are cached.
+
+        :param converter: name of the converter
+        :param attributes: newly cached attributes
+        :return: sorted positions of the jobs in the job list
+        """
+        attributes = set(attributes)
+        return [
+            index
+            for index in self.by_converter.get(converter, [])
+            if self.jobs[index].target in attributes
+        ]
+
+    def order_by_cost(
+        self, cost: Callable[[Job], float], available: Iterable[str]
+    ) -> List[Job]:
+        """
+        Order jobs competing for the same target attribute by their cost.
+
+        Positions of jobs with the same target are kept, only the jobs themselves
+        are reordered among these positions, so the cheapest one is executed first
+        and the more expensive ones only if it fails. A job is moved to a position only
+        if its source attribute is available there (given or targeted by a preceding job),
+        otherwise the competing jobs keep their original order.
+
+        :param cost: function assigning expected cost to a job
+        :param available: attributes available before any job is executed
+        :return: reordered list of jobs
+        """
+        competing = defaultdict(list)
+        for job in self.jobs:
+            competing[job.target].append(job)
+
+        reachable = set(available)
+        ordered = []
+        for job in self.jobs:
+            candidates = competing[job.target]
+            ready = [other for other in candidates if other.source in reachable]
+            chosen = min(ready, key=cost) if ready else candidates[0]
+            candidates.remove(chosen)
+            ordered.append(chosen)
+            reachable.add(chosen.target)
+        return ordered
+
+
+class CostModel:
+    """
+    CostModel estimates expected time needed to obtain the target attribute by a job.
+
+    Latency and hit rate (ratio of conversions which retrieved the target attribute)
+    are measured for every (converter, source, target) edge. The cost is the expected
+    time of the conversion divided by its hit rate. Until enough measurements are available,
+    estimates are smoothed by a prior: local (compute) conversions are considered free,
+    web conversions take `DEFAULT_LATENCY` plus the minimal delay imposed by their throttler.
+    """
+
+    DEFAULT_LATENCY: float = 1.0
+    """Expected latency (in seconds) of a web conversion without any measurements."""
+    DEFAULT_HIT_RATE: float = 0.5
+    """Expected hit rate of a conversion without any measurements."""
+    PRIOR_WEIGHT: float = 5.0
+    """Number of measurements the prior estimates are worth."""
+
+    def __init__(self):
+        self.attempts: Dict[tuple, int] = defaultdict(int)
+        self.hits: Dict[tuple, int] = defaultdict(int)
+        self.elapsed: Dict[tuple, float] = defaultdict(float)
+
+    @staticmethod
+    def edge(job: Job) -> tuple:
+        return job.converter, job.source, job.target
+
+    def record(self, job: Job, elapsed: float, retrieved: bool):
+        """
+        Store measurement of a single conversion.
+
+        :param job: executed job
+        :param elapsed: time (in seconds) spent by the conversion
+        :param retrieved: whether the target attribute was obtained
+        """
+        edge = self.edge(job)
+        self.attempts[edge] += 1
+        self.hits[edge] += int(retrieved)
+        self.elapsed[edge] += elapsed
+
+    def prior_latency(self, converter: Optional[Converter]) -> float:
+        if isinstance(converter, ComputeConverter):
+            return 0.0
+        latency = self.DEFAULT_LATENCY
+        throttler = getattr(converter, "throttler", None)
+        if isinstance(throttler, Throttler):
+            latency += throttler.period / throttler.rate_limit
+        return latency
+
+    def cost(self, job: Job, converter: Optional[Converter] = None) -> float:
+        """
+        Estimate expected time needed to obtain the target attribute by given job.
+
+        :param job: given job
+        :param converter: converter executing the job (used for prior estimates)
+        :return: expected time in seconds
+        """
+        edge = self.edge(job)
+        weight = self.PRIOR_WEIGHT + self.attempts.get(edge, 0)
+        latency = (
+            self.prior_latency(converter) * self.PRIOR_WEIGHT
+            + self.elapsed.get(edge, 0.0)
+        ) / weight
+        hit_rate = (
+            self.DEFAULT_HIT_RATE * self.PRIOR_WEIGHT + self.hits.get(edge, 0)
+        ) / weight
+        return latency / max(hit_rate, 0.01)
+
+    def get_statistics(self) -> Dict[str, Dict]:
+        """
+        Compute measured values of individual edges.
+
+        :return: dictionary suitable for logger.write_statistics
+        """
+        return {
+            "{}: {} -> {}".format(*edge): {
+                "attempts": self.attempts[edge],
+                "hit rate": round(self.hits[edge] / self.attempts[edge], 3),
+                "latency": round(self.elapsed[edge] / self.attempts[edge], 4),
+            }
+            for edge in sorted(self.attempts)
+        }
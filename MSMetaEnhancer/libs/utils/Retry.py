@@ -0,0 +1,102 @@
+import random
+from typing import Optional
+
+
+class RetryPolicy:
+    """
+    Policy deciding how many times and after which delay a failed request is retried.
+
+    Delays grow exponentially with the number of failed attempts and are randomised
+    (full jitter), so retries of many requests failed at once are spread over time
+    instead of hitting the recovering service in a single burst. Delay requested
+    by the service (Retry-After) is honoured up to `max_retry_after` seconds.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 0.2,
+        max_delay: float = 10.0,
+        max_retry_after: float = 60.0,
+    ):
+        """
+        :param max_attempts: maximal number of attempts (including the first one)
+        :param base_delay: upper bound of the delay after the first failed attempt in seconds
+        :param max_delay: upper bound of the delay after any failed attempt in seconds
+        :param max_retry_after: maximal delay requested by the service which is honoured
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Compute delay before the next attempt.
+
+        :param attempt: number of failed attempts so far
+        :param retry_after: delay requested by the service in seconds (if any)
+        :return: delay in seconds
+        """
+        delay = random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+
+class RetryBudget:
+    """
+    Budget limiting retries to a fraction of all requests.
+
+    Every request deposits `ratio` of a token (up to `reserve` tokens) and every retry
+    withdraws a whole token. Once the budget is exhausted, failed requests are not retried,
+    so retries cannot multiply the load of a service which is already failing.
+    """
+
+    def __init__(self, ratio: float = 0.1, reserve: int = 10):
+        """
+        :param ratio: allowed number of retries per request
+        :param reserve: maximal number of tokens, allowing a few retries at the start
+            and after an idle time
+        """
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = float(reserve)
+
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    def deposit(self):
+        """
+        Record a new request.
+        """
+        self.requests += 1
+        self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Try to spend a token on a retry.
+
+        :return: whether the retry is allowed
+        """
+        if self.tokens < 1:
+            self.denied += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+    def get_statistics(self) -> dict:
+        """
+        Report usage of the budget.
+
+        :return: dictionary of named values
+        """
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "denied retries": self.denied,
+        }
@@ -7,21 +7,39 @@ from typing import Deque
 class Throttler:
     """
     Class to limit number of parallel requests by a rate (number per period of time).
+
+    Implemented as a token bucket: tokens are refilled continuously by `rate` tokens per `period`
+    up to `burst` tokens and every request consumes one of them. Waiting requests are kept
+    in a FIFO queue and only the first of them is woken up, exactly when the next token
+    becomes available, so there is no polling.
+
+    By default (`burst` = 1) requests are strictly spaced by `period` / `rate`, so at most
+    `rate` requests are sent within any period. A larger burst allows up to `rate` + `burst` - 1
+    requests within a single period after an idle time.
     """
 
-    def __init__(self, rate_limit=10, period=1, retry_interval=0.01):
+    def __init__(self, rate_limit=10, period=1, burst: int = 1):
+        """
+        :param rate_limit: maximal number of requests per period
+        :param period: length of the period in seconds
+        :param burst: maximal number of requests sent at once after an idle time
+        """
         self.rate = rate_limit
         self.rate_limit = rate_limit
         self.period = period
-        self.retry_interval = retry_interval
+        self.burst = burst
 
-        self._task_logs: Deque[float] = deque()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._timer = None
 
     def increase_limit(self):
         """
         Increase rate up to allow limit.
         """
         if self.rate < self.rate_limit:
+            self._refill()
             self.rate += 1
 
     def decrease_limit(self):
@@ -29,24 +47,52 @@ class Throttler:
         Decrease rate (must be always positive).
         """
         if self.rate > 1:
+            self._refill()
             self.rate -= 1
 
-    def flush(self):
+    def _refill(self):
         now = time.monotonic()
-        while self._task_logs:
-            if now - self._task_logs[0] > self.period:
-                self._task_logs.popleft()
-            else:
-                break
+        self._tokens = min(
+            self.burst,
+            self._tokens + (now - self._updated) * self.rate / self.period,
+        )
+        self._updated = now
+
+    def _schedule(self):
+        """
+        Plan waking up of the first waiter once a token is available.
+        """
+        if self._timer is None and self._waiters:
+            delay = max(0.0, (1 - self._tokens) * self.period / self.rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self):
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._tokens -= 1
+                waiter.set_result(None)
+        self._schedule()
 
     async def acquire(self):
-        while True:
-            self.flush()
-            if len(self._task_logs) < self.rate:
-                break
-            await asyncio.sleep(self.retry_interval)
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
 
-        self._task_logs.append(time.monotonic())
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._schedule()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if not waiter.cancelled():
+                # the token was already granted, give it to the next waiter
+                self._tokens += 1
+                self._schedule()
+            raise
 
     async def __aenter__(self):
         await self.acquire()
@@ -1,7 +1,9 @@
 import asyncio
+import mock
 import pytest
 
 from MSMetaEnhancer.libs.converters.web import BridgeDb
+from MSMetaEnhancer.libs.utils.Cache import PersistentCache
 from tests.utils import wrap_with_session
 
 
@@ -29,3 +31,61 @@ def test_format():
 def test_get_conversions():
     jobs = BridgeDb(None).get_conversion_functions()
     assert ("wikidataid", "pubchemid", "BridgeDb") in jobs
+
+
+def test_parse_attributes():
+    response = "HMDB0000001\tHMDB\nC01152\tKEGG Compound\n92105\tPubChem-compound\n"
+    actual = BridgeDb(None).parse_attributes(response)
+    assert actual == {"hmdbid": "HMDB0000001", "keggid": "C01152", "pubchemid": "92105"}
+
+
+async def test_from_hmdbid_batched():
+    converter = BridgeDb(None, batch_size=10)
+    converter.query_batch = mock.AsyncMock(
+        return_value="HMDB0000001\tHMDB\tCk:C01152,Cpc:92105,Ce:CHEBI:50599\n"
+        "HMDB0000002\tHMDB\t\n"
+    )
+
+    results = await asyncio.gather(
+        converter.from_hmdbid("HMDB0000001"), converter.from_hmdbid("HMDB0000002")
+    )
+    assert results == [
+        {"keggid": "C01152", "pubchemid": "92105", "chebiid": "CHEBI:50599"},
+        dict(),
+    ]
+    converter.query_batch.assert_called_once_with(
+        "BridgeDb_batch",
+        "Ch",
+        method="POST",
+        data="HMDB0000001\nHMDB0000002",
+        headers=converter.header,
+    )
+
+    # found and not found identifiers are remembered without a persistent cache
+    results = await asyncio.gather(
+        converter.from_hmdbid("HMDB0000001"), converter.from_hmdbid("HMDB0000002")
+    )
+    assert results[1] == dict()
+    converter.query_batch.assert_called_once()
+
+
+async def test_from_hmdbid_batched_cache(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"))
+
+    converter = BridgeDb(None, batch_size=10)
+    converter.cache = cache
+    converter.loop_request = mock.AsyncMock(
+        return_value="HMDB0000001\tHMDB\tCk:C01152,Cpc:92105\n"
+    )
+    result = await converter.from_hmdbid("HMDB0000001")
+    assert result == {"keggid": "C01152", "pubchemid": "92105"}
+    converter.loop_request.assert_called_once()
+
+    # the result is served from the cache by a later run
+    converter = BridgeDb(None, batch_size=10)
+    converter.cache = cache
+    converter.loop_request = mock.AsyncMock()
+    result = await converter.from_hmdbid("HMDB0000001")
+    assert result == {"keggid": "C01152", "pubchemid": "92105"}
+    converter.loop_request.assert_not_called()
+    cache.close()
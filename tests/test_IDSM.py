@@ -1,4 +1,5 @@
 import asyncio
+import mock
 import pytest
 import json
 
@@ -65,3 +66,47 @@ def test_get_conversions():
     loop.close()
 
     assert ("inchi", "iupac_name", "IDSM") in jobs
+
+
+def binding(key, value, label):
+    return {
+        "key": {"type": "literal", "value": key},
+        "value": {"type": "literal", "value": value},
+        "type": {
+            "type": "uri",
+            "value": f"http://semanticscience.org/resource/{label}",
+        },
+    }
+
+
+async def test_from_name_batched():
+    converter = IDSM(None, batch_size=10)
+    response = {
+        "head": {"vars": ["key", "value", "type"]},
+        "results": {
+            "bindings": [
+                binding("methane", "CH4", "CHEMINF_000335"),
+                binding("methane", "InChI=1S/CH4/h1H4", "CHEMINF_000396"),
+                binding("o'xylene", "C8H10", "CHEMINF_000335"),
+            ]
+        },
+    }
+    converter.query_batch = mock.AsyncMock(return_value=json.dumps(response))
+
+    results = await asyncio.gather(
+        converter.from_name("Methane"),
+        converter.from_name("O'Xylene"),
+        converter.from_name("unknown"),
+    )
+    assert results == [
+        {"formula": "CH4", "inchi": "InChI=1S/CH4/h1H4"},
+        {"formula": "C8H10"},
+        None,
+    ]
+    converter.query_batch.assert_called_once()
+    query = converter.query_batch.call_args.kwargs["data"]["query"]
+    assert "VALUES ?key" not in query
+    assert (
+        "FILTER(lcase(str(?synonym)) IN ('methane', 'o\\'xylene', 'unknown'))\n          }"
+        in query
+    )
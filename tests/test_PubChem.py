@@ -1,8 +1,11 @@
 import asyncio
 import json
+import mock
 import pytest
 
 from MSMetaEnhancer.libs.converters.web import PubChem
+from MSMetaEnhancer.libs.utils.Cache import PersistentCache
+from MSMetaEnhancer.libs.utils.Errors import UnknownResponse
 from frozendict import frozendict
 
 from tests.utils import wrap_with_session
@@ -78,3 +81,117 @@ def test_convert_inchikey_to_inchi():
 
     actual = asyncio.run(wrap_with_session(PubChem, "inchikey_to_inchi", [inchikey]))
     assert actual["inchi"] == expected
+
+
+def compound(cid, inchikey):
+    return {
+        "id": {"id": {"cid": cid}},
+        "props": [{"urn": {"label": "InChIKey"}, "value": {"sval": inchikey}}],
+    }
+
+
+async def test_from_pubchemid_batched():
+    converter = PubChem(None, batch_size=10)
+    converter.query_batch = mock.AsyncMock(
+        return_value=json.dumps(
+            {"PC_Compounds": [compound(1, "KEY-A"), compound(2, "KEY-B")]}
+        )
+    )
+
+    results = await asyncio.gather(
+        converter.from_pubchemid("1"),
+        converter.from_pubchemid(2),
+        converter.from_pubchemid("3"),
+    )
+    assert results == [
+        {"pubchemid": 1, "inchikey": "KEY-A"},
+        {"pubchemid": 2, "inchikey": "KEY-B"},
+        None,
+    ]
+    converter.query_batch.assert_called_once_with("PubChem", "cid/1,2,3/JSON")
+
+
+async def test_from_inchikey_batched_fallback():
+    async def query(service, args, method, data):
+        if "," in data["inchikey"]:
+            raise UnknownResponse("Invalid")
+        return json.dumps({"PC_Compounds": [compound(1, data["inchikey"])]})
+
+    converter = PubChem(None, batch_size=10)
+    converter.query_batch = mock.AsyncMock(side_effect=query)
+
+    results = await asyncio.gather(
+        converter.from_inchikey("KEY-A"), converter.from_inchikey("KEY-B")
+    )
+    assert results == [
+        {"pubchemid": 1, "inchikey": "KEY-A"},
+        {"pubchemid": 1, "inchikey": "KEY-B"},
+    ]
+    assert converter.query_batch.call_count == 3
+
+
+async def test_from_pubchemid_property_table(monkeypatch):
+    monkeypatch.setattr(PubChem, "PROPERTY_TABLE", True)
+    converter = PubChem(None)
+    converter.query_the_service = mock.AsyncMock(
+        return_value=json.dumps(
+            {
+                "PropertyTable": {
+                    "Properties": [
+                        {
+                            "CID": 123,
+                            "InChI": "random_inchi",
+                            "MolecularFormula": "CH4",
+                            "ConnectivitySMILES": "C",
+                            "IsomericSMILES": "[CH4]",
+                        }
+                    ]
+                }
+            }
+        )
+    )
+
+    actual = await converter.from_pubchemid("123")
+    assert actual == {
+        "pubchemid": 123,
+        "inchi": "random_inchi",
+        "formula": "CH4",
+        "canonical_smiles": "C",
+        "isomeric_smiles": "[CH4]",
+    }
+    converter.query_the_service.assert_called_once_with(
+        "PubChem",
+        "cid/123/property/InChI,InChIKey,IUPACName,MolecularFormula,"
+        "ConnectivitySMILES,SMILES/JSON",
+        method="GET",
+        data=None,
+    )
+
+
+async def test_from_pubchemid_batched_cache(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"))
+
+    converter = PubChem(None, batch_size=10)
+    converter.cache = cache
+    converter.query_batch = mock.AsyncMock(
+        return_value=json.dumps(
+            {"PC_Compounds": [compound(1, "KEY-A"), compound(2, "KEY-B")]}
+        )
+    )
+    await asyncio.gather(converter.from_pubchemid("1"), converter.from_pubchemid("2"))
+
+    # a later run with differently composed batches uses the cached compounds
+    converter = PubChem(None, batch_size=10)
+    converter.cache = cache
+    converter.query_batch = mock.AsyncMock(
+        return_value=json.dumps({"PC_Compounds": [compound(3, "KEY-C")]})
+    )
+    results = await asyncio.gather(
+        converter.from_pubchemid("2"), converter.from_pubchemid("3")
+    )
+    assert results == [
+        {"pubchemid": 2, "inchikey": "KEY-B"},
+        {"pubchemid": 3, "inchikey": "KEY-C"},
+    ]
+    converter.query_batch.assert_called_once_with("PubChem", "cid/3/JSON")
+    cache.close()
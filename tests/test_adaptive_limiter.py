@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from MSMetaEnhancer.libs.utils.AdaptiveLimiter import AdaptiveLimiter
+from MSMetaEnhancer.libs.utils.Errors import ServiceOverloaded, UnknownResponse
+
+
+async def test_limit_bounds_in_flight():
+    limiter = AdaptiveLimiter(initial=3, maximum=3)
+    in_flight = []
+
+    async def request():
+        async with limiter.slot():
+            in_flight.append(limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[request() for _ in range(10)])
+    assert max(in_flight) == 3
+    assert limiter.in_flight == 0
+
+
+async def test_limit_increases_with_flat_latency():
+    limiter = AdaptiveLimiter(initial=2, maximum=8)
+    for _ in range(30):
+        limiter.record_latency(0.1)
+    assert int(limiter.limit) == 8
+
+
+async def test_limit_decreases_on_overload():
+    limiter = AdaptiveLimiter(
+        initial=16, overload=(ServiceOverloaded,), completed=(UnknownResponse,)
+    )
+
+    with pytest.raises(UnknownResponse):
+        async with limiter.slot():
+            raise UnknownResponse("not found")
+    assert int(limiter.limit) == 16
+
+    with pytest.raises(ServiceOverloaded):
+        async with limiter.slot():
+            raise ServiceOverloaded("too many requests")
+    assert int(limiter.limit) == 8
+
+    # a burst of failures within one baseline latency is a single signal
+    limiter.baseline = 1.0
+    limiter.decrease()
+    assert int(limiter.limit) == 8
+
+
+async def test_limit_decreases_on_rising_latency():
+    limiter = AdaptiveLimiter(initial=10)
+    limiter.record_latency(0.001)
+    limiter.record_latency(0.1)
+    assert int(limiter.limit) == 5
+    assert limiter.get_statistics() == {
+        "limit": 5,
+        "in flight": 0,
+        "baseline latency": 0.001,
+    }
+
+
+async def test_cancelled_waiter():
+    limiter = AdaptiveLimiter(initial=1, maximum=1)
+    await limiter.acquire()
+    cancelled = asyncio.ensure_future(limiter.acquire())
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    limiter.release()
+    await asyncio.wait_for(waiting, 0.1)
+    assert limiter.in_flight == 1
@@ -3,8 +3,10 @@ import pytest
 import mock
 
 from MSMetaEnhancer.libs.Annotator import Annotator
+from MSMetaEnhancer.libs.converters.compute.ComputeConverter import ComputeConverter
 from MSMetaEnhancer.libs.utils.Errors import TargetAttributeNotRetrieved
 from MSMetaEnhancer.libs.utils.Job import Job
+from MSMetaEnhancer.libs.utils.Planner import CostModel
 
 
 @pytest.mark.parametrize(
@@ -118,3 +120,130 @@ def test_catch_exception():
 
     result = asyncio.run(annotator.annotate(metadata, jobs))
     assert result == result_metadata
+
+
+def test_annotate_repeat_planned():
+    jobs = [
+        Job(("inchi", "smiles", "IDSM")),
+        Job(("compound_name", "inchi", "IDSM")),
+        Job(("smiles", "mw", "RDKit")),
+        Job(("compound_name", "formula", "IDSM")),
+    ]
+    results = {
+        "inchi": {"compound_name": "$NAME", "inchi": "$InChi"},
+        "smiles": {"smiles": "$SMILES"},
+        "mw": {"mw": "$MW"},
+    }
+
+    async def execute(job, metadata, cache, log):
+        if job.source not in metadata or job.target not in results:
+            raise TargetAttributeNotRetrieved("No data retrieved.")
+        metadata[job.target] = results[job.target][job.target]
+        return metadata, cache
+
+    annotator = Annotator()
+    annotator.set_converters(dict())
+    annotator.execute_job_with_cache = mock.AsyncMock(side_effect=execute)
+
+    metadata = asyncio.run(
+        annotator.annotate({"compound_name": "$NAME"}, jobs, repeat=True)
+    )
+
+    assert metadata == {
+        "compound_name": "$NAME",
+        "inchi": "$InChi",
+        "smiles": "$SMILES",
+        "mw": "$MW",
+    }
+    executed = [
+        call.args[0] for call in annotator.execute_job_with_cache.call_args_list
+    ]
+    assert executed == [jobs[0], jobs[1], jobs[2], jobs[3], jobs[0], jobs[2]]
+
+
+async def test_annotate_concurrent():
+    jobs = [
+        Job(("inchikey", "smiles", "CIR")),
+        Job(("inchikey", "inchi", "CTS")),
+        Job(("inchikey", "inchi", "PubChem")),
+        Job(("inchikey", "formula", "CTS")),
+        Job(("formula", "mw", "RDKit")),
+        Job(("smiles", "mw", "RDKit")),
+    ]
+    running = set()
+    overlapping = []
+
+    async def execute(job, metadata, cache, log):
+        running.add(job.converter)
+        overlapping.append(len(running))
+        await asyncio.sleep(0.01)
+        running.discard(job.converter)
+        if job.converter == "CTS" and job.target == "inchi":
+            raise TargetAttributeNotRetrieved("No data retrieved.")
+        metadata[job.target] = f"${job.target}"
+        return metadata, cache
+
+    annotator = Annotator(concurrent=True)
+    annotator.set_converters(dict())
+    annotator.execute_job_with_cache = mock.AsyncMock(side_effect=execute)
+
+    metadata = await annotator.annotate({"inchikey": "$inchikey"}, jobs)
+
+    assert metadata == {
+        "inchikey": "$inchikey",
+        "smiles": "$smiles",
+        "inchi": "$inchi",
+        "formula": "$formula",
+        "mw": "$mw",
+    }
+    executed = [
+        call.args[0] for call in annotator.execute_job_with_cache.call_args_list
+    ]
+    assert executed == [jobs[0], jobs[1], jobs[3], jobs[2], jobs[4]]
+    assert max(overlapping) > 1
+
+
+def test_annotate_cost_model():
+    jobs = [Job(("inchi", "smiles", "CTS")), Job(("inchi", "smiles", "IDSM"))]
+    cts = mock.Mock()
+    cts.convert = mock.AsyncMock(return_value={})
+    idsm = mock.Mock()
+    idsm.convert = mock.AsyncMock(return_value={"smiles": "C"})
+
+    annotator = Annotator(cost_model=CostModel())
+    annotator.set_converters({"CTS": cts, "IDSM": idsm})
+
+    for _ in range(10):
+        asyncio.run(annotator.annotate({"inchi": "$InChI"}, jobs))
+
+    assert annotator.cost_model.attempts[("CTS", "inchi", "smiles")] < 3
+    assert annotator.cost_model.hits[("IDSM", "inchi", "smiles")] == 10
+    assert idsm.convert.await_count == 10
+
+
+def test_annotate_cost_model_single_pass():
+    jobs = [
+        Job(("compound_name", "inchi", "IDSM")),
+        Job(("inchi", "inchikey", "IDSM")),
+        Job(("inchikey", "canonical_smiles", "IDSM")),
+        Job(("canonical_smiles", "inchi", "RDKit")),
+    ]
+    results = {
+        "inchi": "$InChI",
+        "inchikey": "$InChIKey",
+        "canonical_smiles": "$SMILES",
+    }
+
+    async def execute(job, metadata, cache, log):
+        if job.source not in metadata:
+            raise TargetAttributeNotRetrieved("No data retrieved.")
+        metadata[job.target] = results[job.target]
+        return metadata, cache
+
+    annotator = Annotator(cost_model=CostModel())
+    annotator.set_converters({"RDKit": mock.Mock(spec=ComputeConverter)})
+    annotator.execute_job_with_cache = mock.AsyncMock(side_effect=execute)
+
+    metadata = asyncio.run(annotator.annotate({"compound_name": "$NAME"}, jobs))
+
+    assert metadata == {"compound_name": "$NAME", **results}
@@ -3,10 +3,18 @@ import pytest
 
 from MSMetaEnhancer import Application
 from MSMetaEnhancer.libs.converters.web import IDSM, PubChem
+from MSMetaEnhancer.libs.utils import logger
+from MSMetaEnhancer.libs.utils.Checkpoint import Checkpoint
 from MSMetaEnhancer.libs.utils.ConverterBuilder import ConverterBuilder
+from MSMetaEnhancer.libs.utils.Delta import DeltaWriter, read_delta
+from MSMetaEnhancer.libs.utils.Incremental import IncrementalState
+from MSMetaEnhancer.libs.utils.Errors import CheckpointMismatch
+from MSMetaEnhancer.libs.utils.Job import convert_to_jobs
 from tests.utils import FakeMonitor, FakeAnnotator
 from MSMetaEnhancer.libs.utils.Generic import is_na_value
 
+JOBS = [("compound_name", "smiles", "IDSM")]
+
 
 def test_annotate_spectra_monitor_stops():
     app = Application()
@@ -16,7 +24,7 @@ def test_annotate_spectra_monitor_stops():
     app.load_data("tests/test_data/sample.msp", file_format="msp")
 
     asyncio.run(app.annotate_spectra([], monitor=monitor, annotator=annotator))
-    assert monitor.stop_request.is_set()
+    assert monitor.stopped
 
 
 def test_annotate_spectra_monitor_stops_after_exception():
@@ -29,7 +37,7 @@ def test_annotate_spectra_monitor_stops_after_exception():
     with pytest.raises(Exception):
         asyncio.run(app.annotate_spectra({}, monitor=monitor, annotator=annotator))
 
-    assert monitor.stop_request.is_set()
+    assert monitor.stopped
 
 
 def test_application_sparse():
@@ -40,3 +48,214 @@ def test_application_sparse():
 
     actual = [x.get("canonical_smiles") for x in app.data.get_metadata()]
     assert not any([is_na_value(x) for x in actual])
+
+
+def test_annotate_spectra_window():
+    app = Application()
+    monitor = FakeMonitor()
+    annotator = FakeAnnotator(
+        annotation=lambda metadata: {**metadata, "smiles": "$SMILES"}
+    )
+
+    app.load_data("tests/test_data/sample.msp", file_format="msp")
+
+    asyncio.run(
+        app.annotate_spectra(
+            [],
+            [("compound_name", "smiles", "IDSM")],
+            monitor=monitor,
+            annotator=annotator,
+            window=2,
+        )
+    )
+    metadata = app.data.get_metadata()
+    assert len(metadata) == 3
+    assert all(item["smiles"] == "$SMILES" for item in metadata)
+    assert [item["compound_name"] for item in metadata] == [
+        "Hydrogen",
+        "Deuterium",
+        "Methane",
+    ]
+
+
+def test_annotate_spectra_sidecar(tmp_path):
+    app = Application()
+    annotator = FakeAnnotator(
+        annotation=lambda metadata: {
+            **metadata,
+            "smiles": "C" if metadata["compound_name"] == "Methane" else None,
+        }
+    )
+    app.load_data("tests/test_data/sample.msp", file_format="msp")
+    filename = str(tmp_path / "delta.jsonl")
+
+    with DeltaWriter(filename, key="id") as sidecar:
+        asyncio.run(
+            app.annotate_spectra(
+                [],
+                [("compound_name", "smiles", "IDSM")],
+                monitor=FakeMonitor(),
+                annotator=annotator,
+                sidecar=sidecar,
+            )
+        )
+
+    # attributes without a value are not added
+    assert list(read_delta(filename)) == [
+        {"index": 2, "id": "3", "metadata": {"smiles": "C"}},
+    ]
+
+    original = Application()
+    original.load_data("tests/test_data/sample.msp", file_format="msp")
+    assert original.apply_delta(filename, key="id") == 1
+    assert original.data.get_metadata() == app.data.get_metadata()
+
+
+@pytest.mark.parametrize("window", [None, 2])
+def test_annotate_spectra_resume(window, tmp_path):
+    filename = str(tmp_path / "checkpoint.jsonl")
+    app = Application()
+    annotator = FakeAnnotator(
+        annotation=lambda metadata: {**metadata, "smiles": "$SMILES"}
+    )
+    app.load_data("tests/test_data/sample.msp", file_format="msp")
+
+    with Checkpoint(filename) as checkpoint:
+        checkpoint.start(convert_to_jobs(JOBS), [], [], resume=False)
+        metadata = app.data.get_metadata()[1]
+        checkpoint.write(1, metadata, {**metadata, "smiles": "[2H][2H]"})
+
+    with Checkpoint(filename) as checkpoint:
+        asyncio.run(
+            app.annotate_spectra(
+                [],
+                JOBS,
+                monitor=FakeMonitor(),
+                annotator=annotator,
+                window=window,
+                checkpoint=checkpoint,
+                resume=True,
+            )
+        )
+
+    assert len(annotator.annotated) == 2
+    assert [item["smiles"] for item in app.data.get_metadata()] == [
+        "$SMILES",
+        "[2H][2H]",
+        "$SMILES",
+    ]
+    assert logger.metrics.coverage_before_annotation["smiles"] == 0
+    assert logger.metrics.coverage_after_annotation["smiles"] == 1
+    with Checkpoint(filename) as checkpoint:
+        assert set(checkpoint.completed) == {0, 1, 2}
+
+
+def test_annotate_spectra_incremental(tmp_path):
+    filename = str(tmp_path / "state.jsonl")
+    jobs = [("compound_name", "smiles", "IDSM")]
+    annotator = FakeAnnotator(
+        annotation=lambda metadata: {**metadata, "smiles": "$SMILES"}
+    )
+
+    app = Application()
+    app.load_data("tests/test_data/sample.msp", file_format="msp")
+    asyncio.run(
+        app.annotate_spectra(
+            ["IDSM"],
+            jobs,
+            monitor=FakeMonitor(),
+            annotator=annotator,
+            incremental=IncrementalState(filename),
+        )
+    )
+    assert len(annotator.annotated) == 3
+
+    app = Application()
+    app.load_data("tests/test_data/sample.msp", file_format="msp")
+    app.data.update_metadata(1, {**app.data.get_metadata()[1], "formula": "H2"})
+    asyncio.run(
+        app.annotate_spectra(
+            ["IDSM"],
+            jobs,
+            monitor=FakeMonitor(),
+            annotator=annotator,
+            incremental=IncrementalState(filename),
+        )
+    )
+    assert len(annotator.annotated) == 4
+    assert annotator.annotated[-1]["compound_name"] == "Deuterium"
+    assert logger.metrics.coverage_after_annotation["smiles"] == 2
+    assert all(item["smiles"] == "$SMILES" for item in app.data.get_metadata())
+
+
+def test_annotate_spectra_deduplicate():
+    annotator = FakeAnnotator(
+        annotation=lambda metadata: {
+            **metadata,
+            "smiles": metadata["formula"],
+        }
+    )
+
+    app = Application()
+    app.load_data("tests/test_data/sample.msp", file_format="msp")
+    app.data.update_metadata(2, {**app.data.get_metadata()[2], "formula": "H2"})
+    asyncio.run(
+        app.annotate_spectra(
+            [],
+            [("formula", "smiles", "IDSM")],
+            monitor=FakeMonitor(),
+            annotator=annotator,
+            deduplicate=True,
+        )
+    )
+    assert len(annotator.annotated) == 2
+    assert [item["smiles"] for item in app.data.get_metadata()] == ["H2", "D2", "H2"]
+    assert [item["compound_name"] for item in app.data.get_metadata()] == [
+        "Hydrogen",
+        "Deuterium",
+        "Methane",
+    ]
+
+
+def test_annotate_spectra_resume_mismatch(tmp_path):
+    filename = str(tmp_path / "checkpoint.jsonl")
+    with Checkpoint(filename) as checkpoint:
+        checkpoint.start(convert_to_jobs(JOBS), [], [], resume=False)
+        checkpoint.write(1, {"compound_name": "Other"}, {"smiles": "C"})
+
+    app = Application()
+    app.load_data("tests/test_data/sample.msp", file_format="msp")
+    annotator = FakeAnnotator(annotation=lambda metadata: metadata)
+
+    with Checkpoint(filename) as checkpoint:
+        with pytest.raises(CheckpointMismatch):
+            asyncio.run(
+                app.annotate_spectra(
+                    [],
+                    JOBS,
+                    monitor=FakeMonitor(),
+                    annotator=annotator,
+                    checkpoint=checkpoint,
+                    resume=True,
+                )
+            )
+
+
+def test_annotate_spectra_retry_budget_per_run():
+    ConverterBuilder.register([PubChem, IDSM])
+    app = Application()
+    app.load_data("tests/test_data/sample.msp", file_format="msp")
+    annotator = FakeAnnotator(annotation=lambda metadata: metadata)
+
+    budgets = []
+    for _ in range(2):
+        asyncio.run(
+            app.annotate_spectra(
+                ["PubChem", "IDSM"], JOBS, monitor=FakeMonitor(), annotator=annotator
+            )
+        )
+        converters = annotator.converters
+        budgets.append(converters["PubChem"].retry_budget)
+        assert converters["IDSM"].retry_budget is budgets[-1]
+
+    assert budgets[0] is not budgets[1]
@@ -0,0 +1,46 @@
+import asyncio
+
+import mock
+import pytest
+
+from MSMetaEnhancer.libs.utils.Batcher import Batcher
+
+
+async def test_submit_batched():
+    async def resolve(keys):
+        return {key: key.upper() for key in keys}
+
+    resolver = mock.AsyncMock(side_effect=resolve)
+    batcher = Batcher(resolver, max_size=10, window=0.01)
+
+    results = await asyncio.gather(
+        *[batcher.submit(key) for key in ["a", "b", "a", "c"]]
+    )
+    assert results == ["A", "B", "A", "C"]
+    resolver.assert_called_once_with(["a", "b", "c"])
+
+
+async def test_submit_max_size():
+    resolver = mock.AsyncMock(side_effect=lambda keys: {key: key for key in keys})
+    batcher = Batcher(resolver, max_size=2, window=10)
+
+    results = await asyncio.gather(*[batcher.submit(key) for key in range(4)])
+    assert results == [0, 1, 2, 3]
+    assert resolver.call_count == 2
+
+
+async def test_submit_exceptions():
+    async def resolve(keys):
+        return {"a": "A", "b": ValueError("b")}
+
+    batcher = Batcher(resolve, window=0.01)
+    results = await asyncio.gather(
+        *[batcher.submit(key) for key in ["a", "b", "c"]], return_exceptions=True
+    )
+    assert results[0] == "A"
+    assert isinstance(results[1], ValueError)
+    assert results[2] is None
+
+    batcher = Batcher(mock.AsyncMock(side_effect=KeyError), window=0.01)
+    with pytest.raises(KeyError):
+        await batcher.submit("a")
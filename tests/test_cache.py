@@ -0,0 +1,80 @@
+import asyncio
+import os
+
+import mock
+from frozendict import frozendict
+
+from MSMetaEnhancer.libs.converters.web.WebConverter import WebConverter
+from MSMetaEnhancer.libs.utils.Cache import PersistentCache
+
+
+def test_set_get(tmp_path):
+    cache = PersistentCache(os.path.join(tmp_path, "cache.sqlite"))
+    data = frozendict({"inchi": "$InChI"})
+
+    assert cache.get("PubChem", "PubChem", "inchi/JSON", "POST", data, None) is None
+    cache.set("PubChem", "PubChem", "inchi/JSON", "POST", data, None, "response")
+    assert (
+        cache.get("PubChem", "PubChem", "inchi/JSON", "POST", data, None) == "response"
+    )
+    assert cache.get("PubChem", "PubChem", "inchi/JSON", "GET", None, None) is None
+    assert cache.get_statistics() == {"PubChem": {"hits": 1, "misses": 2}}
+    cache.close()
+
+    # stored data survive reopening
+    cache = PersistentCache(os.path.join(tmp_path, "cache.sqlite"))
+    assert cache.size == 1
+    assert (
+        cache.get("PubChem", "PubChem", "inchi/JSON", "POST", data, None) == "response"
+    )
+    cache.close()
+
+
+def test_raw_body(tmp_path):
+    cache = PersistentCache(os.path.join(tmp_path, "cache.sqlite"))
+
+    cache.set("BridgeDb", "BridgeDb_batch", "Ch", "POST", "ID1\nID2", None, "response")
+    assert (
+        cache.get("BridgeDb", "BridgeDb_batch", "Ch", "POST", "ID1\nID2") == "response"
+    )
+    assert cache.get("BridgeDb", "BridgeDb_batch", "Ch", "POST", "ID1") is None
+    cache.close()
+
+
+def test_ttl(tmp_path):
+    cache = PersistentCache(
+        os.path.join(tmp_path, "cache.sqlite"), ttl={"CTS": -1}, default_ttl=None
+    )
+    cache.set("CTS", "CTS", "arg", "GET", None, None, "response")
+    cache.set("CIR", "CIR", "arg", "GET", None, None, "response")
+
+    assert cache.get("CTS", "CTS", "arg") is None
+    assert cache.get("CIR", "CIR", "arg") == "response"
+    assert cache.size == 1
+
+
+def test_eviction(tmp_path):
+    cache = PersistentCache(os.path.join(tmp_path, "cache.sqlite"), max_entries=2)
+    cache.set("CIR", "CIR", "first", "GET", None, None, "1")
+    cache.set("CIR", "CIR", "second", "GET", None, None, "2")
+    cache.set("CIR", "CIR", "third", "GET", None, None, "3")
+
+    assert cache.size == 2
+    assert cache.get("CIR", "CIR", "first") is None
+    assert cache.get("CIR", "CIR", "third") == "3"
+
+
+def test_query_the_service_cached(tmp_path):
+    converter = WebConverter(mock.Mock())
+    converter.endpoints = {"CTS": "what a converter"}
+    converter.cache = PersistentCache(os.path.join(tmp_path, "cache.sqlite"))
+    converter.cache.set("WebConverter", "CTS", "cached", "GET", None, None, "value")
+    converter.loop_request = mock.AsyncMock(return_value="response")
+
+    result = asyncio.run(converter.query_the_service("CTS", "cached"))
+    assert result == "value"
+    converter.loop_request.assert_not_called()
+
+    result = asyncio.run(converter.query_the_service("CTS", "not cached"))
+    assert result == "response"
+    assert converter.cache.get("WebConverter", "CTS", "not cached") == "response"
@@ -0,0 +1,78 @@
+import pytest
+
+from MSMetaEnhancer.libs.utils.Checkpoint import Checkpoint
+from MSMetaEnhancer.libs.utils.Errors import CheckpointMismatch
+from MSMetaEnhancer.libs.utils.Job import convert_to_jobs
+
+JOBS = convert_to_jobs([("compound_name", "smiles", "IDSM")])
+
+
+def test_checkpoint_reopen(tmp_path):
+    filename = str(tmp_path / "checkpoint.jsonl")
+    with Checkpoint(filename) as checkpoint:
+        checkpoint.write(0, {"name": "Hydrogen"}, {"name": "Hydrogen"})
+        checkpoint.write(2, {"name": "Methane"}, {"name": "Methane", "smiles": "C"})
+
+    with Checkpoint(filename) as checkpoint:
+        assert 0 in checkpoint and 2 in checkpoint and 1 not in checkpoint
+        assert checkpoint.restore(2, {"name": "Methane"}) == {
+            "name": "Methane",
+            "smiles": "C",
+        }
+        checkpoint.write(1, {"name": "Deuterium"}, {"name": "Deuterium"})
+
+    with Checkpoint(filename) as checkpoint:
+        assert set(checkpoint.completed) == {0, 1, 2}
+        checkpoint.clear()
+
+    with Checkpoint(filename) as checkpoint:
+        assert checkpoint.completed == {}
+
+
+def test_checkpoint_incomplete_line(tmp_path):
+    filename = tmp_path / "checkpoint.jsonl"
+    filename.write_text('{"index": 0, "metadata": {}}\n{"index": 1, "meta')
+
+    with Checkpoint(str(filename)) as checkpoint:
+        assert set(checkpoint.completed) == {0}
+        checkpoint.write(1, {}, {"smiles": "C"})
+
+    with Checkpoint(str(filename)) as checkpoint:
+        assert checkpoint.completed == {0: {}, 1: {"smiles": "C"}}
+
+
+def test_checkpoint_start(tmp_path):
+    filename = str(tmp_path / "checkpoint.jsonl")
+    records = [{"name": "Methane"}]
+    with Checkpoint(filename) as checkpoint:
+        checkpoint.start(JOBS, ["IDSM"], records, resume=True)
+        checkpoint.write(0, {"name": "Methane"}, {"name": "Methane", "smiles": "C"})
+
+    with Checkpoint(filename) as checkpoint:
+        checkpoint.start(JOBS, ["IDSM"], records, resume=True)
+        assert checkpoint.restore(0, {"name": "Methane"})["smiles"] == "C"
+
+    # different (or reordered) input data
+    for other in [[{"name": "Hydrogen"}], [{"name": "Hydrogen"}, *records], []]:
+        with Checkpoint(filename) as checkpoint:
+            with pytest.raises(CheckpointMismatch):
+                checkpoint.start(JOBS, ["IDSM"], other, resume=True)
+
+    with Checkpoint(filename) as checkpoint:
+        with pytest.raises(CheckpointMismatch):
+            checkpoint.start(JOBS, ["IDSM", "PubChem"], records, resume=True)
+
+        checkpoint.start(JOBS, ["IDSM", "PubChem"], records, resume=False)
+        assert checkpoint.completed == {}
+
+    with Checkpoint(filename) as checkpoint:
+        checkpoint.start(JOBS, ["IDSM", "PubChem"], records, resume=True)
+
+
+def test_checkpoint_start_without_fingerprint(tmp_path):
+    filename = tmp_path / "checkpoint.jsonl"
+    filename.write_text('{"index": 0, "metadata": {}}\n')
+
+    with Checkpoint(str(filename)) as checkpoint:
+        with pytest.raises(CheckpointMismatch):
+            checkpoint.start(JOBS, ["IDSM"], [{}], resume=True)
@@ -0,0 +1,46 @@
+from aiohttp import web
+
+from MSMetaEnhancer.libs.converters.web import IDSM, PubChem
+from MSMetaEnhancer.libs.utils.Connection import ConnectionPool
+from MSMetaEnhancer.libs.utils.ConverterBuilder import ConverterBuilder
+
+
+async def test_get_session():
+    async with ConnectionPool(keepalive_timeout=5, ttl_dns_cache=60) as pool:
+        session = pool.get_session(IDSM)
+        assert session.connector.limit == IDSM.MAX_CONCURRENCY
+        assert session.connector.limit_per_host == IDSM.MAX_CONCURRENCY
+        assert session.timeout == IDSM.TIMEOUT
+        assert pool.get_session(PubChem).timeout == PubChem.TIMEOUT
+    assert session.closed
+    assert pool.sessions == []
+
+
+async def test_connection_reuse(aiohttp_server):
+    async def handler(request):
+        return web.Response(text="OK")
+
+    app = web.Application()
+    app.router.add_route("GET", "/", handler)
+    server = await aiohttp_server(app)
+
+    async with ConnectionPool() as pool:
+        session = pool.get_session(PubChem)
+        for _ in range(3):
+            async with session.get(server.make_url("/")) as response:
+                assert await response.text() == "OK"
+
+    statistics = pool.get_statistics()["PubChem"]
+    assert statistics["requests"] == 3
+    assert statistics["new connections"] == 1
+    assert statistics["reused connections"] == 2
+
+
+async def test_build_converters():
+    ConverterBuilder.register([PubChem, IDSM])
+    async with ConnectionPool() as pool:
+        _, web_converters = ConverterBuilder.build_converters(
+            None, ["PubChem", "IDSM"], pool
+        )
+        assert web_converters["PubChem"].session is not web_converters["IDSM"].session
+        assert len(pool.sessions) == 2
@@ -1,4 +1,5 @@
 import asyncio
+import time
 
 import mock
 import pytest
@@ -10,9 +11,13 @@ from asyncio.exceptions import TimeoutError
 from MSMetaEnhancer.libs.converters.web.WebConverter import WebConverter
 from MSMetaEnhancer.libs.utils.Errors import (
     TargetAttributeNotRetrieved,
+    ServiceOverloaded,
     UnknownResponse,
     ServiceNotAvailable,
 )
+from MSMetaEnhancer.libs.utils.AdaptiveLimiter import AdaptiveLimiter
+from MSMetaEnhancer.libs.utils.Retry import RetryBudget, RetryPolicy
+from MSMetaEnhancer.libs.utils.Throttler import Throttler
 
 
 def test_query_the_service():
@@ -68,6 +73,73 @@ async def test_loop_request_fail(aiohttp_client):
         await converter.loop_request("/", "GET", None, None)
 
 
+async def test_send_request_reports_outcome():
+    converter = WebConverter(mock.Mock())
+    callback = mock.Mock()
+    converter.outcome_callbacks.append(callback)
+
+    converter.make_request = mock.AsyncMock(return_value="ok")
+    await converter.send_request("/", "GET", None, None)
+    callback.assert_called_with(converter, True)
+
+    converter.make_request = mock.AsyncMock(side_effect=UnknownResponse())
+    with pytest.raises(UnknownResponse):
+        await converter.send_request("/", "GET", None, None)
+    callback.assert_called_with(converter, True)
+
+    converter.make_request = mock.AsyncMock(side_effect=TimeoutError())
+    with pytest.raises(TimeoutError):
+        await converter.send_request("/", "GET", None, None)
+    callback.assert_called_with(converter, False)
+
+
+@pytest.fixture
+def retried_converter():
+    converter = WebConverter(mock.Mock())
+    converter.RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=0)
+    converter.retry_budget = RetryBudget()
+    yield converter
+
+
+async def test_loop_request_retry(retried_converter):
+    retried_converter.send_request = mock.AsyncMock(
+        side_effect=[TimeoutError(), ServiceOverloaded("busy", retry_after=0), "ok"]
+    )
+
+    result = await retried_converter.loop_request("/", "GET", None, None)
+    assert result == "ok"
+    assert retried_converter.send_request.call_count == 3
+    assert retried_converter.retry_budget.retries == 2
+
+
+async def test_loop_request_retry_exhausted(retried_converter):
+    retried_converter.send_request = mock.AsyncMock(side_effect=TimeoutError())
+
+    with pytest.raises(ServiceNotAvailable):
+        await retried_converter.loop_request("/", "GET", None, None)
+    assert retried_converter.send_request.call_count == 3
+
+
+async def test_loop_request_retry_budget(retried_converter):
+    retried_converter.retry_budget = RetryBudget(reserve=1)
+    retried_converter.send_request = mock.AsyncMock(side_effect=TimeoutError())
+
+    with pytest.raises(ServiceNotAvailable):
+        await retried_converter.loop_request("/", "GET", None, None)
+    assert retried_converter.send_request.call_count == 2
+    assert retried_converter.retry_budget.denied == 1
+
+
+async def test_loop_request_not_retried(retried_converter):
+    retried_converter.send_request = mock.AsyncMock(
+        side_effect=UnknownResponse("not found")
+    )
+
+    with pytest.raises(UnknownResponse):
+        await retried_converter.loop_request("/", "GET", None, None)
+    assert retried_converter.send_request.call_count == 1
+
+
 @pytest.fixture(
     params=[
         TimeoutError,
@@ -117,6 +189,7 @@ def test_process_request_exception(ok, status):
 
     response = mock.AsyncMock()
     response.status = status
+    response.headers = {}
     response.text = mock.AsyncMock(return_value="this is response")
     response.ok = ok
 
@@ -124,6 +197,28 @@ def test_process_request_exception(ok, status):
         asyncio.run(converter.process_request(response, "/", "GET"))
 
 
+@pytest.mark.parametrize(
+    "status, headers, retry_after",
+    [
+        [429, {"Retry-After": "3"}, 3.0],
+        [503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0.0],
+        [503, {}, None],
+    ],
+)
+def test_process_request_overloaded(status, headers, retry_after):
+    converter = WebConverter(mock.Mock())
+
+    response = mock.AsyncMock()
+    response.status = status
+    response.headers = headers
+    response.text = mock.AsyncMock(return_value="this is response")
+    response.ok = False
+
+    with pytest.raises(ServiceOverloaded) as exc:
+        asyncio.run(converter.process_request(response, "/", "GET"))
+    assert exc.value.retry_after == retry_after
+
+
 def test_convert():
     converter = WebConverter(mock.Mock())
     converter.A_to_B = mock.AsyncMock()
@@ -158,3 +253,93 @@ async def test_lru_cache(aiohttp_client):
 
     _ = await converter.query_the_service("/", "")
     assert converter.query_the_service.cache_info().hits == 2
+
+
+async def test_query_the_service_coalesced():
+    async def slow_request(*args):
+        await asyncio.sleep(0.1)
+        return "response"
+
+    converter = WebConverter(mock.Mock())
+    converter.endpoints = {"CTS": "what a converter"}
+    converter.loop_request = mock.AsyncMock(side_effect=slow_request)
+
+    results = await asyncio.gather(
+        *[converter.query_the_service("CTS", "coalesced") for _ in range(5)]
+    )
+    assert results == ["response"] * 5
+    converter.loop_request.assert_called_once()
+    assert converter._in_flight == {}
+
+
+async def test_send_request_enters_limits():
+    semaphore = asyncio.Semaphore(1)
+
+    async def request(*args):
+        assert semaphore.locked()
+        assert converter.concurrency.in_flight == 1
+        return "response"
+
+    converter = WebConverter(mock.Mock())
+    converter.limits = [semaphore]
+    converter.make_request = mock.AsyncMock(side_effect=request)
+
+    result = await converter.fetch("CTS", "arg", "url", "GET", None, None)
+    assert result == "response"
+    assert not semaphore.locked()
+    assert converter.concurrency.in_flight == 0
+
+
+async def test_send_request_keeps_throttler_spacing():
+    durations = iter([0.35, 0.3, 0.01, 0.01])
+    starts = []
+
+    async def request(*args):
+        starts.append(time.monotonic())
+        await asyncio.sleep(next(durations))
+        return "response"
+
+    converter = WebConverter(mock.Mock())
+    converter.concurrency = AdaptiveLimiter(initial=2, maximum=2)
+    converter.limits = [Throttler(rate_limit=4, period=0.2)]
+    converter.make_request = mock.AsyncMock(side_effect=request)
+
+    await asyncio.gather(
+        *[converter.send_request("url", "GET", None, None) for _ in range(4)]
+    )
+    # requests waiting for a slot do not hold tokens, so they are not sent at once
+    assert all(later - earlier >= 0.045 for earlier, later in zip(starts, starts[1:]))
+
+
+async def test_resolve_with_cache_shares_pending_identifiers():
+    converter = WebConverter(mock.Mock())
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def resolve(keys):
+        started.set()
+        await release.wait()
+        return {key: None if key == "b" else key.upper() for key in keys}
+
+    resolve = mock.AsyncMock(side_effect=resolve)
+    first = asyncio.ensure_future(
+        converter.resolve_with_cache("ids", ["a", "b"], resolve)
+    )
+    await started.wait()
+    second = asyncio.ensure_future(
+        converter.resolve_with_cache("ids", ["b", "c"], resolve)
+    )
+    release.set()
+
+    assert await first == {"a": "A", "b": None}
+    assert await second == {"b": None, "c": "C"}
+    assert [call.args[0] for call in resolve.call_args_list] == [["a", "b"], ["c"]]
+
+
+async def test_resolve_with_cache_forgets_failures():
+    converter = WebConverter(mock.Mock())
+    error = UnknownResponse("Invalid")
+    resolve = mock.AsyncMock(side_effect=[{"a": error}, {"a": "A"}])
+
+    assert await converter.resolve_with_cache("ids", ["a"], resolve) == {"a": error}
+    assert await converter.resolve_with_cache("ids", ["a"], resolve) == {"a": "A"}
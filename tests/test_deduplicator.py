@@ -0,0 +1,37 @@
+import asyncio
+
+from MSMetaEnhancer.libs.utils.Deduplicator import Deduplicator
+from MSMetaEnhancer.libs.utils.Job import convert_to_jobs
+
+
+async def test_deduplicator():
+    jobs = convert_to_jobs(
+        [("inchikey", "smiles", "PubChem"), ("smiles", "inchi", "RDKit")]
+    )
+    deduplicator = Deduplicator(jobs)
+    annotated = []
+
+    async def annotate(metadata):
+        annotated.append(metadata["id"])
+        await asyncio.sleep(0.01)
+        metadata["smiles"] = metadata["inchikey"].lower()
+        return metadata
+
+    records = [
+        {"id": 1, "inchikey": "A", "energy": 10},
+        {"id": 2, "inchikey": "A", "energy": 20},
+        {"id": 3, "inchikey": "B", "energy": 10},
+        {"id": 4, "inchikey": "A", "smiles": "C", "energy": 30},
+    ]
+    results = await asyncio.gather(
+        *[deduplicator.annotate(record, annotate) for record in records]
+    )
+
+    assert annotated == [1, 3, 4]
+    assert results == [
+        {"id": 1, "inchikey": "A", "energy": 10, "smiles": "a"},
+        {"id": 2, "inchikey": "A", "energy": 20, "smiles": "a"},
+        {"id": 3, "inchikey": "B", "energy": 10, "smiles": "b"},
+        {"id": 4, "inchikey": "A", "smiles": "a", "energy": 30},
+    ]
+    assert records[0] == {"id": 1, "inchikey": "A", "energy": 10}
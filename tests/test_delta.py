@@ -0,0 +1,54 @@
+from MSMetaEnhancer.libs.data import Spectra
+from MSMetaEnhancer.libs.utils.Delta import (
+    DeltaWriter,
+    apply_delta,
+    metadata_delta,
+    read_delta,
+)
+
+
+def test_metadata_delta():
+    original = {"name": "Methane", "formula": "CH4", "mw": "16"}
+    annotated = {"name": "Methane", "formula": "CH4", "mw": 16.0, "smiles": "C"}
+    assert metadata_delta(original, annotated) == {"mw": 16.0, "smiles": "C"}
+    assert metadata_delta(original, dict(original)) == {}
+    assert metadata_delta(original, {**original, "smiles": None, "inchi": "NA"}) == {}
+
+
+def test_delta_writer(tmp_path):
+    filename = str(tmp_path / "delta.jsonl")
+    with DeltaWriter(filename, key="id") as writer:
+        writer.write(0, {"id": "1"}, {"id": "1"})
+        writer.write(2, {"id": "3"}, {"id": "3", "smiles": "C"})
+
+    assert list(read_delta(filename)) == [
+        {"index": 2, "id": "3", "metadata": {"smiles": "C"}}
+    ]
+
+
+def test_apply_delta(tmp_path):
+    filename = str(tmp_path / "delta.jsonl")
+    with DeltaWriter(filename, key="id") as writer:
+        writer.write(0, {"id": "1"}, {"id": "1", "smiles": "[H][H]"})
+        writer.write(2, {"id": "3"}, {"id": "3", "smiles": "C"})
+        writer.write(5, {"id": "6"}, {"id": "6", "smiles": "CC"})
+
+    data = Spectra()
+    data.load_data("tests/test_data/sample.msp", "msp")
+    assert apply_delta(data, filename) == 2
+    assert [item.get("smiles") for item in data.get_metadata()] == [
+        "[H][H]",
+        None,
+        "C",
+    ]
+
+    data = Spectra()
+    data.load_data("tests/test_data/sample.msp", "msp")
+    data.update_metadata(0, {**data.get_metadata()[0], "id": "3"})
+    data.update_metadata(2, {**data.get_metadata()[2], "id": "1"})
+    assert apply_delta(data, filename, key="id") == 2
+    assert [item.get("smiles") for item in data.get_metadata()] == [
+        "C",
+        None,
+        "[H][H]",
+    ]
@@ -0,0 +1,26 @@
+from MSMetaEnhancer.libs.utils.Incremental import IncrementalState
+from MSMetaEnhancer.libs.utils.Job import convert_to_jobs
+
+
+def test_incremental_state(tmp_path):
+    filename = str(tmp_path / "state.jsonl")
+    jobs = convert_to_jobs([("compound_name", "smiles", "IDSM")])
+    record = {"compound_name": "Methane"}
+
+    state = IncrementalState(filename)
+    state.set_context(jobs, ["IDSM"])
+    fingerprint = state.fingerprint(record)
+    assert state.restore(fingerprint, record) is None
+    state.update(fingerprint, record, {**record, "smiles": "C"})
+    state.save()
+
+    state = IncrementalState(filename)
+    state.set_context(jobs, ["IDSM"])
+    assert state.fingerprint(record) == fingerprint
+    assert state.restore(fingerprint, record) == {**record, "smiles": "C"}
+    assert state.fingerprint({"compound_name": "Ethane"}) != fingerprint
+
+    state.set_context(jobs, ["IDSM", "PubChem"])
+    assert state.fingerprint(record) != fingerprint
+    state.set_context(convert_to_jobs([("compound_name", "inchi", "IDSM")]), ["IDSM"])
+    assert state.fingerprint(record) != fingerprint
@@ -1,7 +1,8 @@
 import pytest
 import mock
 
-from MSMetaEnhancer.libs.data import Spectra, DataFrame
+from MSMetaEnhancer.libs.data import Spectra, DataFrame, IndexedSpectra
+from MSMetaEnhancer.libs.utils.Errors import UnknownFileFormat
 
 
 DATA = [
@@ -38,6 +39,8 @@ DATA = [
         [Spectra(), "msp", "tests/test_data/sample.msp"],
         [Spectra(), "mgf", "tests/test_data/sample.mgf"],
         [Spectra(), "json", "tests/test_data/sample.json"],
+        [IndexedSpectra(), "msp", "tests/test_data/sample.msp"],
+        [IndexedSpectra(), "mgf", "tests/test_data/sample.mgf"],
         [DataFrame(), "csv", "tests/test_data/sample_metadata.csv"],
         [DataFrame(), "tsv", "tests/test_data/sample_metadata.tsv"],
         [DataFrame(), "xlsx", "tests/test_data/sample_metadata.xlsx"],
@@ -137,6 +140,12 @@ def test_tabular_data():
             "tests/test_data/sample_with_na.msp",
             ["inchikey", "smiles"],
         ],
+        [
+            IndexedSpectra(),
+            "msp",
+            "tests/test_data/sample_with_na.msp",
+            ["inchikey", "smiles"],
+        ],
     ],
 )
 def test_na_values_filtered_from_metadata(backend, file_type, filename, absent_keys):
@@ -152,3 +161,136 @@ def test_na_values_filtered_from_metadata(backend, file_type, filename, absent_k
             assert key not in meta_item, (
                 f"NA key '{key}' should not be present at index {i}, got {meta_item.get(key)}"
             )
+
+
+def test_update_metadata_dataframe():
+    df = DataFrame()
+    df.load_data("tests/test_data/sample_metadata.csv", "csv")
+    metadata = list(df.iter_metadata())
+    assert metadata == df.get_metadata()
+
+    metadata[1]["mw"] = 4.028
+    metadata[1]["smiles"] = "[2H][2H]"
+    df.update_metadata(1, metadata[1])
+
+    assert df.get_metadata()[1] == metadata[1]
+    assert "smiles" not in df.get_metadata()[0]
+
+
+@pytest.mark.parametrize(
+    "file_type, filename",
+    [
+        ["msp", "tests/test_data/sample.msp"],
+        ["msp", "tests/test_data/sample_with_na.msp"],
+        ["mgf", "tests/test_data/sample.mgf"],
+    ],
+)
+def test_indexed_spectra_metadata(file_type, filename):
+    spectra = Spectra()
+    spectra.load_data(filename, file_type)
+    indexed = IndexedSpectra()
+    indexed.load_data(filename, file_type)
+
+    assert indexed.get_metadata() == spectra.get_metadata()
+    assert len(indexed) == len(spectra)
+
+
+@pytest.mark.parametrize(
+    "file_type, filename",
+    [["msp", "tests/test_data/sample.msp"], ["mgf", "tests/test_data/sample.mgf"]],
+)
+def test_indexed_spectra_save_data(file_type, filename, tmp_path):
+    indexed = IndexedSpectra()
+    indexed.load_data(filename, file_type)
+    metadata = indexed.get_metadata()
+    metadata[2]["smiles"] = "C"
+    indexed.update_metadata(2, metadata[2])
+
+    target = str(tmp_path / f"output.{file_type}")
+    indexed.save_data(target, file_type)
+
+    original = Spectra()
+    original.load_data(filename, file_type)
+    saved = Spectra()
+    saved.load_data(target, file_type)
+
+    assert saved.get_metadata() == metadata
+    for first, second in zip(original.spectrums, saved.spectrums):
+        assert first.peaks == second.peaks
+
+
+def test_indexed_spectra_unsupported_format(tmp_path):
+    indexed = IndexedSpectra()
+    with pytest.raises(UnknownFileFormat):
+        indexed.load_data("tests/test_data/sample.json", "json")
+
+    indexed.load_data("tests/test_data/sample.msp", "msp")
+    with pytest.raises(UnknownFileFormat):
+        indexed.save_data(str(tmp_path / "output.mgf"), "mgf")
+
+
+@pytest.mark.parametrize(
+    "file_type, filename",
+    [["msp", "tests/test_data/sample.msp"], ["mgf", "tests/test_data/sample.mgf"]],
+)
+def test_indexed_spectra_save_unchanged_verbatim(file_type, filename, tmp_path):
+    indexed = IndexedSpectra()
+    indexed.load_data(filename, file_type)
+    indexed.fuse_metadata(indexed.get_metadata())
+    assert indexed.changed == set()
+
+    target = tmp_path / f"output.{file_type}"
+    indexed.save_data(str(target), file_type)
+
+    with open(filename, "rb") as original:
+        assert target.read_bytes() == original.read()
+
+
+def test_indexed_spectra_save_splices_changed_record(tmp_path):
+    filename = "tests/test_data/sample.msp"
+    indexed = IndexedSpectra()
+    indexed.load_data(filename, "msp")
+    metadata = indexed.get_metadata()[1]
+    metadata["smiles"] = "[2H][2H]"
+    indexed.update_metadata(1, metadata)
+    assert indexed.changed == {1}
+
+    target = tmp_path / "output.msp"
+    indexed.save_data(str(target), "msp")
+
+    with open(filename, "rb") as file:
+        original = file.read()
+    output = target.read_bytes()
+    first, second, third = indexed.records
+    assert output.startswith(original[: second.start])
+    assert output.endswith(original[third.start :])
+    assert b"SMILES: [2H][2H]\n" in output
+    assert original[second.peaks : second.end] in output
+
+
+@pytest.mark.parametrize(
+    "file_type, filename",
+    [["msp", "tests/test_data/sample.msp"], ["mgf", "tests/test_data/sample.mgf"]],
+)
+def test_indexed_spectra_save_in_place(file_type, filename, tmp_path):
+    source = tmp_path / f"input.{file_type}"
+    source.write_bytes(open(filename, "rb").read())
+
+    indexed = IndexedSpectra()
+    indexed.load_data(str(source), file_type)
+    metadata = indexed.get_metadata()
+    metadata[2]["smiles"] = "C"
+    indexed.update_metadata(2, metadata[2])
+    indexed.save_data(str(source), file_type)
+
+    assert indexed.get_metadata() == metadata
+    assert indexed.changed == set()
+    assert [path.name for path in tmp_path.iterdir()] == [source.name]
+
+    original = Spectra()
+    original.load_data(filename, file_type)
+    saved = Spectra()
+    saved.load_data(str(source), file_type)
+    assert saved.get_metadata() == metadata
+    for first, second in zip(original.spectrums, saved.spectrums):
+        assert first.peaks == second.peaks
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from MSMetaEnhancer.libs.utils import Json
+from MSMetaEnhancer.libs.utils.Json import iter_json_array, load_json_array
+
+
+BINDINGS = [
+    {"value": {"value": "CH4"}, "type": {"value": "CHEMINF_000335"}},
+    {"value": {"value": 'a [quoted] "value"'}, "type": {"value": "x"}},
+]
+DOCUMENT = {"head": {"vars": ["value", "type"]}, "results": {"bindings": BINDINGS}}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        json.dumps(DOCUMENT),
+        json.dumps(DOCUMENT, indent=4),
+        json.dumps({"results": {"note": "bindings", "bindings": BINDINGS}}),
+        json.dumps({"head": {"bindings": []}, "results": {"bindings": BINDINGS}}),
+        json.dumps({"results": {"bindings": BINDINGS}, "bindings": []}),
+    ],
+)
+def test_iter_json_array(text):
+    assert list(iter_json_array(text, ("results", "bindings"))) == BINDINGS
+
+
+def test_iter_json_array_empty():
+    text = json.dumps({"results": {"bindings": []}})
+    assert list(iter_json_array(text, ("results", "bindings"))) == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        json.dumps(DOCUMENT)[:-30],
+        '{"results": {"bindings": [1, 2',
+        '{"results": {"bindings": [1 2]}}',
+        '{"results" {"bindings": []}}',
+    ],
+)
+def test_iter_json_array_malformed(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(text, ("results", "bindings")))
+
+
+def test_iter_json_array_missing():
+    with pytest.raises(KeyError):
+        list(iter_json_array(json.dumps({"results": {}}), ("results", "bindings")))
+
+
+async def test_load_json_array(monkeypatch):
+    text = json.dumps(DOCUMENT)
+    assert await load_json_array(text, ("results", "bindings")) == BINDINGS
+
+    monkeypatch.setattr(Json, "LARGE_DOCUMENT", 0)
+    assert await load_json_array(text, ("results", "bindings"), 1) == BINDINGS
@@ -0,0 +1,87 @@
+import asyncio
+
+import aiohttp
+import mock
+from aiohttp import web
+
+from MSMetaEnhancer.libs.utils.Monitor import Monitor
+
+
+def make_converter(session, url):
+    converter = mock.Mock()
+    converter.session = session
+    converter.endpoints = {"Service": url + "/api/"}
+    converter.is_available = True
+    converter.outcome_callbacks = []
+    converter.concurrency.in_flight = 0
+    return converter
+
+
+async def test_check_services(aiohttp_server):
+    async def handler(request):
+        return web.Response(text="OK")
+
+    app = web.Application()
+    app.router.add_route("GET", "/", handler)
+    server = await aiohttp_server(app)
+
+    async with aiohttp.ClientSession() as session:
+        available = make_converter(session, str(server.make_url("")).rstrip("/"))
+        unavailable = make_converter(session, "http://localhost:1")
+
+        monitor = Monitor()
+        monitor.set_converters({"available": available, "unavailable": unavailable})
+        await monitor.check_services()
+
+    assert available.is_available
+    assert not unavailable.is_available
+
+
+async def test_start_stop():
+    converter = make_converter(mock.Mock(), "http://localhost:1")
+    monitor = Monitor()
+    monitor.check_services = mock.AsyncMock()
+    monitor.set_converters({"Service": converter})
+
+    monitor.start()
+    await asyncio.sleep(0)
+    monitor.check_services.assert_called_once()
+    assert not monitor.task.done()
+
+    await monitor.stop()
+    assert monitor.task is None
+
+
+def test_record_outcome():
+    converter = make_converter(mock.Mock(), "http://localhost:1")
+    converter.converter_name = "Service"
+    monitor = Monitor()
+    monitor.set_converters({"Service": converter})
+    assert converter.outcome_callbacks == [monitor.record_outcome]
+
+    for _ in range(Monitor.FAILURE_THRESHOLD - 1):
+        monitor.record_outcome(converter, False)
+    assert converter.is_available
+
+    monitor.record_outcome(converter, False)
+    assert not converter.is_available
+
+    monitor.record_outcome(converter, True)
+    assert converter.is_available
+
+
+async def test_check_services_busy():
+    converter = make_converter(mock.Mock(), "http://localhost:1")
+    converter.converter_name = "Service"
+    monitor = Monitor()
+    monitor.check_service = mock.AsyncMock(return_value=False)
+    monitor.set_converters({"Service": converter})
+
+    monitor.record_outcome(converter, True)
+    converter.concurrency.in_flight = 4
+    await monitor.check_services()
+    assert converter.is_available
+
+    converter.concurrency.in_flight = 0
+    await monitor.check_services()
+    assert not converter.is_available
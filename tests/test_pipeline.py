@@ -0,0 +1,24 @@
+import asyncio
+import random
+
+from MSMetaEnhancer.libs.utils.Pipeline import annotate_in_order
+
+
+async def test_annotate_in_order():
+    in_flight = set()
+    max_in_flight = []
+
+    async def annotate(index, metadata):
+        assert index == metadata["id"]
+        in_flight.add(metadata["id"])
+        max_in_flight.append(len(in_flight))
+        await asyncio.sleep(random.random() / 100)
+        in_flight.discard(metadata["id"])
+        return {**metadata, "annotated": True}
+
+    records = ({"id": i} for i in range(20))
+    results = [item async for item in annotate_in_order(annotate, records, 3)]
+
+    assert [index for index, _ in results] == list(range(20))
+    assert all(metadata == {"id": i, "annotated": True} for i, metadata in results)
+    assert max(max_in_flight) <= 3
@@ -0,0 +1,104 @@
+import mock
+
+from MSMetaEnhancer.libs.converters.compute import RDKit
+from MSMetaEnhancer.libs.utils.Job import Job, convert_to_jobs
+from MSMetaEnhancer.libs.utils.Planner import CostModel, JobPlanner
+from MSMetaEnhancer.libs.utils.Throttler import Throttler
+
+
+JOBS = convert_to_jobs(
+    [
+        ("inchi", "smiles", "IDSM"),
+        ("compound_name", "inchi", "IDSM"),
+        ("inchi", "formula", "PubChem"),
+        ("smiles", "mw", "RDKit"),
+    ]
+)
+
+
+def test_graph():
+    planner = JobPlanner(JOBS)
+    assert planner.graph == {
+        "inchi": {"smiles", "formula"},
+        "compound_name": {"inchi"},
+        "smiles": {"mw"},
+    }
+
+
+def test_triggered_by():
+    planner = JobPlanner(JOBS)
+    assert planner.triggered_by(["inchi"]) == [0, 2]
+    assert planner.triggered_by(["smiles", "compound_name"]) == [1, 3]
+    assert planner.triggered_by(["mw"]) == []
+
+
+def test_triggered_by_cache():
+    planner = JobPlanner(JOBS)
+    assert planner.triggered_by_cache("IDSM", ["smiles", "formula"]) == [0]
+    assert planner.triggered_by_cache("RDKit", ["smiles"]) == []
+
+
+def test_order_by_cost():
+    jobs = convert_to_jobs(
+        [
+            ("compound_name", "inchi", "CTS"),
+            ("inchi", "smiles", "IDSM"),
+            ("compound_name", "inchi", "IDSM"),
+            ("inchi", "smiles", "RDKit"),
+            ("inchi", "formula", "PubChem"),
+        ]
+    )
+    costs = {"CTS": 3.0, "IDSM": 1.0, "RDKit": 0.0, "PubChem": 2.0}
+    ordered = JobPlanner(jobs).order_by_cost(
+        lambda job: costs[job.converter], {"compound_name"}
+    )
+
+    assert [str(job) for job in ordered] == [
+        "IDSM: compound_name -> inchi",
+        "RDKit: inchi -> smiles",
+        "CTS: compound_name -> inchi",
+        "IDSM: inchi -> smiles",
+        "PubChem: inchi -> formula",
+    ]
+
+
+def test_order_by_cost_unavailable_source():
+    jobs = convert_to_jobs(
+        [
+            ("compound_name", "inchi", "IDSM"),
+            ("inchi", "inchikey", "IDSM"),
+            ("inchikey", "canonical_smiles", "IDSM"),
+            ("canonical_smiles", "inchi", "RDKit"),
+        ]
+    )
+    costs = {"IDSM": 1.0, "RDKit": 0.0}
+    ordered = JobPlanner(jobs).order_by_cost(
+        lambda job: costs[job.converter], {"compound_name"}
+    )
+    assert ordered == jobs
+
+    ordered = JobPlanner(jobs).order_by_cost(
+        lambda job: costs[job.converter], {"compound_name", "canonical_smiles"}
+    )
+    assert ordered == [jobs[3], jobs[1], jobs[2], jobs[0]]
+
+
+def test_cost_model():
+    model = CostModel()
+    job = Job(("inchi", "smiles", "IDSM"))
+    throttled = mock.Mock(throttler=Throttler(rate_limit=4))
+
+    assert model.cost(Job(("inchi", "smiles", "RDKit")), RDKit()) == 0.0
+    assert model.cost(job) == 2.0
+    assert model.cost(job, throttled) == 2.5
+
+    for _ in range(15):
+        model.record(job, 0.2, False)
+    assert model.cost(job) > 2.0
+    for _ in range(80):
+        model.record(job, 0.2, True)
+    assert model.cost(job) < 0.5
+
+    assert model.get_statistics() == {
+        "IDSM: inchi -> smiles": {"attempts": 95, "hit rate": 0.842, "latency": 0.2}
+    }
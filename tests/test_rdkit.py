@@ -1,3 +1,6 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import pytest
 
 from MSMetaEnhancer.libs.converters.compute import RDKit
@@ -22,9 +25,96 @@ CANONICAL_SMILES = "CC12CCC(=O)C=C1CCC1C2CCC2(C)C(O)CCC12"
         ["formula_to_mw", "C9H15N4O8P", {"mw": 338.21299999999997}],
         ["smiles_to_formula", CANONICAL_SMILES, {"formula": "C19H28O2"}],
         ["inchi_to_formula", INCHI, {"formula": "C19H28O2"}],
+        ["inchi_to_inchikey", INCHI, {"inchikey": "MUMGGOZAMZWBJJ-DYKIIFRCSA-N"}],
+        ["inchi_to_mw", INCHI, {"mw": 288.208930136}],
+        [
+            "inchi_to_smiles",
+            INCHI,
+            {"smiles": "C[C@]12CC[C@H]3[C@@H](CCC4=CC(=O)CC[C@@]43C)[C@@H]1CC[C@@H]2O"},
+        ],
+        ["smiles_to_inchikey", "OCC", {"inchikey": "LFQSCWFLJHTTHZ-UHFFFAOYSA-N"}],
+        ["smiles_to_inchi", "OCC", {"inchi": "InChI=1S/C2H6O/c1-2-3/h3H,2H2,1H3"}],
+        ["smiles_to_canonical_smiles", "OCC", {"canonical_smiles": "CCO"}],
+        [
+            "smiles_to_isomeric_smiles",
+            "C[C@H](N)C(=O)O",
+            {"isomeric_smiles": "C[C@H](N)C(=O)O"},
+        ],
+        [
+            "smiles_to_canonical_smiles",
+            "C[C@H](N)C(=O)O",
+            {"canonical_smiles": "CC(N)C(=O)O"},
+        ],
+        ["smiles_to_inchi", "invalid", {}],
+        ["inchi_to_inchikey", "invalid", {}],
     ],
 )
 def test_convert_methods(method, input, expected):
     func = getattr(RDKit(), method)
     actual = func(input)
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "executor, batch_size",
+    [
+        [ThreadPoolExecutor(max_workers=2), 1],
+        [ThreadPoolExecutor(max_workers=2), 10],
+        [ProcessPoolExecutor(max_workers=1), 10],
+        [None, 10],
+    ],
+)
+async def test_convert_in_executor(executor, batch_size, monkeypatch):
+    monkeypatch.setattr(RDKit, "EXECUTOR", executor)
+    monkeypatch.setattr(RDKit, "BATCH_SIZE", batch_size)
+    converter = RDKit()
+
+    results = await asyncio.gather(
+        converter.convert("inchi", "formula", INCHI),
+        converter.convert("inchi", "formula", INCHI),
+        converter.convert("inchi", "canonical_smiles", INCHI),
+        converter.convert("smiles", "mw", "invalid"),
+        return_exceptions=True,
+    )
+
+    assert results[0] == results[1] == {"formula": "C19H28O2"}
+    assert results[2] == {"canonical_smiles": CANONICAL_SMILES}
+    assert isinstance(results[3], Exception)
+    if executor is not None:
+        executor.shutdown()
+
+
+@pytest.mark.parametrize("batch_size", [1, 10])
+async def test_mol_cache_in_threads(batch_size, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(RDKit, "EXECUTOR", executor)
+    monkeypatch.setattr(RDKit, "BATCH_SIZE", batch_size)
+    converter = RDKit()
+    assert not converter.in_process_pool
+
+    await converter.convert("inchi", "formula", INCHI)
+    await converter.convert("inchi", "canonical_smiles", INCHI)
+    assert converter.get_statistics()["inchi"] == {"hits": 1, "misses": 1, "size": 1}
+    executor.shutdown()
+
+
+def test_mol_cache():
+    converter = RDKit()
+    converter.inchi_to_canonical_smiles(INCHI)
+    converter.inchi_to_isomeric_smiles(INCHI)
+    converter.inchi_to_formula(INCHI)
+    converter.from_smiles(CANONICAL_SMILES)
+    converter.smiles_to_formula(CANONICAL_SMILES)
+
+    assert converter.get_statistics() == {
+        "smiles": {"hits": 1, "misses": 1, "size": 1},
+        "inchi": {"hits": 2, "misses": 1, "size": 1},
+    }
+
+
+def test_mol_cache_returns_copies():
+    converter = RDKit()
+    assert converter.mol_from_inchi(INCHI) is not converter.mol_from_inchi(INCHI)
+
+    converter.inchi_to_canonical_smiles(INCHI)
+    assert not converter.parse_inchi(INCHI).HasProp("_smilesAtomOutputOrder")
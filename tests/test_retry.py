@@ -0,0 +1,41 @@
+import pytest
+
+from MSMetaEnhancer.libs.utils.Retry import RetryBudget, RetryPolicy
+
+
+@pytest.mark.parametrize("attempt, bound", [[1, 0.2], [2, 0.4], [3, 0.8], [10, 10.0]])
+def test_delay_exponential(attempt, bound):
+    policy = RetryPolicy()
+    delays = [policy.delay(attempt) for _ in range(100)]
+    assert all(0 <= delay <= bound for delay in delays)
+    # jitter spreads the retries
+    assert len(set(delays)) > 1
+
+
+def test_delay_retry_after():
+    policy = RetryPolicy(max_retry_after=5.0)
+    assert policy.delay(1, retry_after=3.0) == 3.0
+    assert policy.delay(1, retry_after=100.0) == 5.0
+
+
+def test_budget():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+    # tokens do not accumulate over the reserve
+    for _ in range(100):
+        budget.deposit()
+    assert budget.tokens == 2
+
+    assert budget.get_statistics() == {
+        "requests": 102,
+        "retries": 3,
+        "denied retries": 2,
+    }
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+from MSMetaEnhancer.libs.utils.Throttler import Throttler
+
+
+async def test_throttler_rate():
+    throttler = Throttler(rate_limit=10, period=0.1)
+    order = []
+
+    async def request(index):
+        async with throttler:
+            order.append((index, time.monotonic()))
+
+    start = time.monotonic()
+    await asyncio.gather(*[request(index) for index in range(30)])
+    elapsed = time.monotonic() - start
+
+    assert [index for index, _ in order] == list(range(30))
+    # requests are spaced by 10 ms, so no period contains more than 10 of them
+    assert 0.28 <= elapsed < 0.5
+    timestamps = [timestamp for _, timestamp in order]
+    assert all(
+        later - earlier >= 0.095 for earlier, later in zip(timestamps, timestamps[10:])
+    )
+
+
+async def test_throttler_burst():
+    throttler = Throttler(rate_limit=10, period=0.1, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        await throttler.acquire()
+    # two tokens at once, then one token every 10 ms
+    assert 0.015 <= time.monotonic() - start < 0.1
+
+
+async def test_throttler_decrease_limit():
+    throttler = Throttler(rate_limit=4, period=0.1)
+    for _ in range(3):
+        throttler.decrease_limit()
+    throttler.decrease_limit()
+    assert throttler.rate == 1
+
+    await throttler.acquire()
+    start = time.monotonic()
+    await throttler.acquire()
+    assert time.monotonic() - start >= 0.08
+
+    throttler.increase_limit()
+    assert throttler.rate == 2
+
+
+async def test_throttler_cancelled_waiter():
+    throttler = Throttler(rate_limit=1, period=0.05)
+    await throttler.acquire()
+
+    cancelled = asyncio.ensure_future(throttler.acquire())
+    waiting = asyncio.ensure_future(throttler.acquire())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    await asyncio.wait_for(waiting, 0.09)
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
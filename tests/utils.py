@@ -1,5 +1,4 @@
 import aiohttp
-from threading import Thread, Event
 import time
 
 
@@ -9,27 +8,24 @@ async def wrap_with_session(converter, method, args):
         return await getattr(converter, method)(*args)
 
 
-class FakeMonitor(Thread):
+class FakeMonitor:
     """
     Fake Monitor to test basic functionality.
     """
 
     def __init__(self):
-        super(FakeMonitor, self).__init__()
         self.converters = None
-        self.stop_request = Event()
-        self.first_check = Event()
+        self.started = False
+        self.stopped = False
 
     def set_converters(self, converters):
         self.converters = converters
 
-    def run(self):
-        while not self.stop_request.is_set():
-            self.first_check.set()
-            time.sleep(10)
+    def start(self):
+        self.started = True
 
-    def join(self, timeout=None):
-        self.stop_request.set()
+    async def stop(self):
+        self.stopped = True
 
 
 class FakeAnnotator:
@@ -37,9 +33,17 @@ class FakeAnnotator:
     Fake Annotator to test basic functionality.
     """
 
-    def __init__(self, raise_exception=False):
+    def __init__(self, raise_exception=False, annotation=None):
+        """
+        :param raise_exception: whether annotation of every spectra fails
+        :param annotation: optional function computing annotated metadata from given metadata,
+            the metadata are returned unchanged after a delay otherwise
+        """
         self.converters = None
         self.raise_exception = raise_exception
+        self.annotation = annotation
+        self.cost_model = None
+        self.annotated = []
 
     def set_converters(self, converters):
         self.converters = converters
@@ -47,6 +51,8 @@ class FakeAnnotator:
     async def annotate(self, spectra, jobs, repeat=False):
         if self.raise_exception:
             raise Exception
-        else:
-            time.sleep(1)
-            return spectra
+        self.annotated.append(dict(spectra))
+        if self.annotation is not None:
+            return self.annotation(spectra)
+        time.sleep(1)
+        return spectra